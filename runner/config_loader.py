@@ -85,7 +85,8 @@ def create_sample_config(output_path: Path):
             "hard_weight": "Points awarded for each hard question",
             "max_points": "Maximum total points (should equal sum of all weights)",
             "exam_time_minutes": "Total time allowed for the exam in minutes",
-            "work_dir_postfix": "Postfix for the student's working directoriy (e.g., name_surname_POSTFIX)"
+            "work_dir_postfix": "Postfix for the student's working directoriy (e.g., name_surname_POSTFIX)",
+            "parallel_grading": "Optional, default false. Run a question's test cases concurrently when grading"
         },
         "_examples": [
             {
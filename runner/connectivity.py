@@ -1,34 +1,141 @@
+import select
 import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Sequence, Tuple
 
-def check_internet_connectivity(timeout: float = 2.0) -> bool:
+# rtnetlink multicast groups (linux/rtnetlink.h)
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+# Public DNS resolvers probed on port 53
+DNS_PROBE_TARGETS = (
+    ("1.1.1.1", 53),         # Cloudflare
+    ("8.8.8.8", 53),         # Google
+    ("208.67.222.222", 53),  # OpenDNS
+    ("9.9.9.9", 53),         # Quad9
+)
+
+
+def _probe(address: Tuple[str, int], timeout: float) -> bool:
+    """Open and immediately close a TCP connection to address."""
+    try:
+        conn = socket.create_connection(address, timeout=timeout)
+    except OSError:
+        return False
+    conn.close()
+    return True
+
+
+def check_internet_connectivity(
+    timeout: float = 2.0,
+    targets: Sequence[Tuple[str, int]] = DNS_PROBE_TARGETS
+) -> bool:
     """
     Check if the system has internet connectivity by attempting to connect
     to a reliable external host.
     
+    All targets are probed concurrently and the first successful connection
+    wins, so an offline check costs one timeout rather than one per target.
+    
     Args:
         timeout: Connection timeout in seconds
+        targets: (host, port) pairs to try
         
     Returns:
         True if internet connection detected, False otherwise
     """
+    executor = ThreadPoolExecutor(max_workers=len(targets))
     try:
-        # connect to Cloudflare's DNS server
-        socket.create_connection(("1.1.1.1", 53), timeout=timeout)
-        return True
-    except OSError:
+        futures = [executor.submit(_probe, address, timeout) for address in targets]
+        for future in as_completed(futures):
+            if future.result():
+                return True
+        return False
+    finally:
+        # Every probe has its own worker, so none is left queued; just don't
+        # wait for the slower ones once one has answered
+        executor.shutdown(wait=False)
+
+
+class NetworkChangeWatcher:
+    """
+    Block until the network configuration changes or a timeout elapses.
+
+    On Linux this listens on an AF_NETLINK route socket for link and address
+    events, so a cable being plugged in or Wi-Fi associating wakes the caller
+    immediately. Where netlink is unavailable (other platforms, restricted
+    sandboxes) wait() simply sleeps for the timeout, which keeps the old
+    fixed-interval polling behaviour.
+
+    interrupt() makes the current and all later wait() calls return at once,
+    so a monitor thread blocked here can be stopped without waiting out its
+    interval.
+    """
+
+    def __init__(self):
+        self._sock = None
+        self._interrupted = threading.Event()
+        self._wake_r = self._wake_w = None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        except (AttributeError, OSError):
+            return
         try:
-            # Fallback: Google's DNS
-            socket.create_connection(("8.8.8.8", 53), timeout=timeout)
-            return True
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+            sock.setblocking(False)
         except OSError:
+            sock.close()
+            return
+        self._sock = sock
+        # select() can't wait on the Event, so interrupt() also writes here
+        self._wake_r, self._wake_w = socket.socketpair()
+
+    @property
+    def is_event_driven(self) -> bool:
+        """True if wait() can return early on a network change."""
+        return self._sock is not None
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Wait up to timeout seconds for a network change.
+
+        Returns:
+            True if a change was reported, False if the timeout elapsed or
+            the watcher was interrupted
+        """
+        if self._interrupted.is_set():
+            return False
+        if self._sock is None:
+            self._interrupted.wait(timeout)
+            return False
+
+        readable, _, _ = select.select([self._sock, self._wake_r], [], [], timeout)
+        if self._sock not in readable:
+            return False
+
+        # Drain the burst of messages a single change usually produces
+        try:
+            while self._sock.recv(65536):
+                pass
+        except OSError:  # BlockingIOError once the queue is empty
+            pass
+        return True
+
+    def interrupt(self):
+        """Wake a blocked wait() and make later calls return immediately."""
+        self._interrupted.set()
+        wake_w = self._wake_w
+        if wake_w is not None:
             try:
-                # Fallback: OpenDNS
-                socket.create_connection(("208.67.222.222", 53), timeout=timeout)
-                return True
-            except OSError:
-                try:
-                    # Fallback: Quad9
-                    socket.create_connection(("9.9.9.9", 53), timeout=timeout)
-                    return True
-                except OSError:
-                    return False
\ No newline at end of file
+                wake_w.send(b"\0")
+            except OSError:  # closed concurrently, or the buffer is already full
+                pass
+
+    def close(self):
+        """Release the netlink socket."""
+        for sock in (self._sock, self._wake_r, self._wake_w):
+            if sock is not None:
+                sock.close()
+        self._sock = self._wake_r = self._wake_w = None
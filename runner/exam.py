@@ -7,8 +7,10 @@ Handles task assignment, code submission, testing, and result packaging.
 """
 
 import os
+import re
 import sys
 import argparse
+import atexit
 import getpass
 import json
 import hashlib
@@ -16,23 +18,185 @@ import base64
 import time
 import math
 import random
+import queue
+import select
 import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-from zipfile import ZipFile, ZIP_DEFLATED
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, stdlib json is used otherwise
+    orjson = None
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional, code files are polled with stat() otherwise
+    FileSystemEventHandler = object
+    Observer = None
 
 from .models import Bank, Task, ExamConfig
 from .grader import Grader
 from .config_loader import load_config
-from .connectivity import check_internet_connectivity
+from .connectivity import check_internet_connectivity, NetworkChangeWatcher
 from .ai_detector import AIDetector, check_ai_tools_at_startup
 from .translations import TRANSLATIONS
 
 
+# session.log entries are queued in memory and written by a background thread
+# every LOG_FLUSH_INTERVAL seconds, or sooner once LOG_BATCH_SIZE are pending
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL = 0.5
+
+# Audit events that are written and fsynced as soon as they are logged (with
+# anything queued before them), so a crash or kill can't drop them
+LOG_SYNC_EVENTS = frozenset({
+    "SESSION_START", "SESSION_EXIT", "SESSION_FINISH", "SESSION_FINISH_TIMEOUT",
+    "EXAM_START", "EXAM_RESUME", "EXAM_TIMEOUT",
+    "SUBMISSION", "AUTO_SUBMISSION", "LARGE_CODE_ADDITION", "ERROR",
+    "NETWORK_DETECTED", "NETWORK_DISCONNECTED",
+    "AI_PROCESS_DETECTED", "AI_PROCESSES_CLOSED", "AI_PROCESSES_STILL_RUNNING", "SUSPICIOUS_PASTE",
+})
+
+# Network monitor entries are held back until NETWORK_LOG_BATCH_SIZE are
+# pending, NETWORK_LOG_FLUSH_INTERVAL seconds have passed or the status changes
+NETWORK_LOG_BATCH_SIZE = 60
+NETWORK_LOG_FLUSH_INTERVAL = 60
+
+# While the exam is paused for network access, connectivity is re-probed
+# after 1s, 2s, 4s... up to this many seconds. A netlink change report
+# re-probes at once and starts again from 1s; without netlink (other
+# platforms) the lower cap keeps the resume delay short.
+NETWORK_RECHECK_MAX_DELAY = 30
+NETWORK_RECHECK_MAX_DELAY_POLLING = 8
+
+# Submission ZIP members larger than this are deflated (at level 1); smaller
+# ones are stored, where compression setup costs more than it saves
+ZIP_DEFLATE_MIN_SIZE = 4096
+
+# Per-question block of results.txt, filled from a submission dict
+_RESULTS_SUBMITTED_TMPL = (
+    "  SUBMITTED @ {timestamp}\n"
+    "  - Score: {score:.2f} / {max_score:.2f} ({passed}/{total} passed)\n"
+)
+
+# Sudoku board frame used by ExamRunner._format_sudoku_board
+_SUDOKU_TOP = "┌───────┬───────┬───────┐"
+_SUDOKU_MID = "├───────┼───────┼───────┤"
+_SUDOKU_BOTTOM = "└───────┴───────┴───────┘"
+_SUDOKU_ROW = "│ {} {} {} │ {} {} {} │ {} {} {} │"
+
+# Language codes a multi-language bank may use as top-level keys, and the
+# top-level keys shared by all of its languages
+_LANGUAGE_CODES = frozenset(TRANSLATIONS)
+_BANK_META_KEYS = frozenset({"group", "version", "network_monitoring", "ai_detection"})
+
+# Anything str.isalnum() rejects; \W is the complement of Unicode alnum plus '_'.
+_UNSAFE_NAME_CHARS = re.compile(r'[\W_]')
+
+
+def _safe_name(text: str) -> str:
+    """Replace every non-alphanumeric character with an underscore."""
+    return _UNSAFE_NAME_CHARS.sub('_', text)
+
+
+class _CodeFileEventHandler(FileSystemEventHandler):
+    """Queue the question name of every qN.py that is written in the work dir."""
+
+    _WRITE_EVENTS = frozenset(("created", "modified", "moved"))
+
+    def __init__(self, qns, events: "queue.SimpleQueue[str]"):
+        super().__init__()
+        self._file_to_qn = {f"{qn}.py": qn for qn in qns}
+        self._events = events
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in self._WRITE_EVENTS:
+            return
+        # Editors often save via a temp file renamed over qN.py
+        path = getattr(event, "dest_path", "") or event.src_path
+        qn = self._file_to_qn.get(os.path.basename(path))
+        if qn is not None:
+            self._events.put(qn)
+
+
+def _sha256_file(path: Path) -> str:
+    """Hash a file in chunks without reading it into memory whole."""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(65536), b''):
+            h.update(chunk)
+        return h.hexdigest()
+
+
+# 19+ digit literals may not fit in 64 bits (see _json_loads)
+_WIDE_INT_LITERAL = re.compile(rb'\d{19,}')
+
+
+def _json_loads(data: bytes):
+    """Parse JSON from bytes, using orjson when it is installed."""
+    # orjson only handles 64-bit integers; leave anything wider to json so
+    # test values round-trip exactly
+    if orjson is not None and not _WIDE_INT_LITERAL.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _write_json_atomic(path: Path, data: dict):
+    """
+    Write data as indented JSON to path in a single write.
+
+    The payload goes to a sibling temp file that is synced to disk and then
+    renamed over the destination, so a crash or power loss mid-write never
+    leaves an empty or truncated file behind. If the write fails, the temp
+    file is removed and the destination is left as it was.
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2).encode('utf-8')
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+@functools.lru_cache(maxsize=4)
+def _pbkdf2_fernet_key(password: str, salt: bytes) -> bytes:
+    """
+    Derive a Fernet key from a password with PBKDF2-HMAC-SHA256.
+
+    hashlib hands the whole derivation to OpenSSL in one call; the result is
+    cached so re-reading the bank with the same password and salt is free.
+    """
+    key_material = hashlib.pbkdf2_hmac(
+        'sha256',
+        password.encode('utf-8'),
+        salt,
+        480000,  # OWASP recommendation for 2024
+        dklen=32,
+    )
+    return base64.urlsafe_b64encode(key_material)
+
+
 class ExamSession:
     """Manages the state of a student's exam session."""
     
@@ -48,21 +212,51 @@ class ExamSession:
         self.name = name
         self.surname = surname
         self.student_name = f"{surname}, {name}"
+        # Filesystem-safe forms, as used in the work dir and ZIP names
+        self.safe_name = _safe_name(name.lower())
+        self.safe_surname = _safe_name(surname.lower())
         self.group = group
         self.bank = bank
         self.work_dir = work_dir
         self.config = config
         self.grader = Grader(config)
+        # Saved-state files present when the session was created; a fresh work
+        # dir then skips the open() attempts in load_assignment/load_timer_state
+        self._resume_files = frozenset(os.listdir(work_dir)) & {"assignment.json", "timer_state.json"}
+        
+        # Config values read on every timer/results pass
+        self._total_questions = config.total_questions
+        self._exam_time_minutes = config.exam_time_minutes
         
         self.assigned_tasks: Dict[str, Task] = {}  # qN -> Task
         
-        # Submission state - dynamic based on config
-        self.submissions: Dict[str, Optional[Dict]] = {
-            f"q{i+1}": None for i in range(config.total_questions)
-        }
+        # Question names in order ("q1", "q2", ...), built once per session
+        self.qns = tuple(f"q{i+1}" for i in range(self._total_questions))
+        self.qn_set = frozenset(self.qns)
+        self.qns_display = ", ".join(self.qns)
+        self.code_files = {qn: f"{qn}.py" for qn in self.qns}  # relative to work_dir
         
-        # Log file
+        # Submission state - dynamic based on config
+        self.submissions: Dict[str, Optional[Dict]] = dict.fromkeys(self.qns)
+        self._total_score = 0.0  # running sum of submission scores, see record_submission()
+        self._submitted_count = 0  # questions with a submission, see record_submission()
+        self._failed_test_nums: Dict[str, List[int]] = {}  # per question, see record_submission()
+        self._results_dirty = True  # results.txt needs (re)writing, see generate_results_file()
+        self._code_hashes: Dict[str, Tuple[int, int, str]] = {}  # path -> (mtime_ns, size, sha256)
+        
+        # Log file (kept open for the whole session, see log())
         self.log_path = work_dir / "session.log"
+        self._log_lock = threading.Lock()
+        self._log_fh = open(self.log_path, 'a', encoding='utf-8', buffering=64 * 1024)
+        self._log_buf: Deque[Tuple[float, str, str]] = deque()  # (time.time(), event, details)
+        self._log_ts_cache: Tuple[int, str] = (-1, "")  # (epoch second, formatted), see _format_log_entry()
+        self._log_wake = threading.Event()
+        self._log_stop = threading.Event()
+        self._log_writer = threading.Thread(target=self._log_writer_loop, daemon=True)
+        self._log_writer.start()
+        # Paths that leave without reaching run()'s cleanup (sys.exit during
+        # setup, unhandled errors) still get the queued entries on disk
+        atexit.register(self.close_log)
         self.assignment_path = work_dir / "assignment.json"
         self.results_path = work_dir / "results.txt"
         
@@ -71,6 +265,8 @@ class ExamSession:
         
         # Track failed attempts
         self.failed_attempts: Dict[str, int] = {}
+        # Pass rate of the last grading run, with qN.py's mtime at the time
+        self.last_pass_rate: Dict[str, Tuple[int, float]] = {}
 
         # AI detection
         self.ai_detector = None
@@ -79,18 +275,99 @@ class ExamSession:
         # Exam timing
         self.exam_start_time: Optional[datetime] = None
         self.exam_end_time: Optional[datetime] = None
+        self._exam_end_epoch: Optional[float] = None  # exam_end_time as time.time() seconds
         self.timer_state_path = work_dir / "timer_state.json"
+        self._timer_dirty = False  # timer_state.json is behind, see save_timer_state()
     
-    def log(self, event: str, details: str = ""):
-        """Append an entry to the session log."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def _format_log_entry(self, when: float, event: str, details: str) -> str:
+        """
+        Format one log line; `when` is the time.time() value it was recorded at.
+
+        Called with _log_lock held. Entries in a batch mostly share a second,
+        so the last formatted timestamp is reused.
+        """
+        second = int(when)
+        cached_second, timestamp = self._log_ts_cache
+        if second != cached_second:
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+            self._log_ts_cache = (second, timestamp)
         log_entry = f"[{timestamp}] - {event}"
         if details:
             log_entry += f" - {details}"
-        log_entry += "\n"
-        
-        with open(self.log_path, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
+        return log_entry + "\n"
+
+    def log(self, event: str, details: str = ""):
+        """Append an entry to the session log."""
+        # Monitor threads log concurrently with the command loop. log() only
+        # queues the entry; the writer thread writes batches every
+        # LOG_FLUSH_INTERVAL seconds or once LOG_BATCH_SIZE entries are pending.
+        # Only the raw time is taken here; the writer formats the line.
+        # LOG_SYNC_EVENTS are written through at once instead.
+        self._log_buf.append((time.time(), event, details))
+        if event in LOG_SYNC_EVENTS:
+            self.flush_log()
+        else:
+            self._notify_log_writer()
+
+    def log_entries(self, entries: Iterable[Tuple[float, str, str]]):
+        """
+        Append several (timestamp, event, details) entries at once.
+
+        Used for entries that were collected earlier; each keeps the
+        time.time() value it was recorded with.
+        """
+        entries = list(entries)
+        self._log_buf.extend(entries)
+        if any(event in LOG_SYNC_EVENTS for _, event, _ in entries):
+            self.flush_log()
+        else:
+            self._notify_log_writer()
+
+    def _notify_log_writer(self):
+        """Wake the writer thread if a batch is ready (or write directly once stopped)."""
+        if self._log_stop.is_set():
+            self._write_log_buf()  # writer already stopped (late monitor event)
+        elif len(self._log_buf) >= LOG_BATCH_SIZE:
+            self._log_wake.set()
+
+    def _log_writer_loop(self):
+        """Background thread writing queued log entries to session.log."""
+        while not self._log_stop.is_set():
+            self._log_wake.wait(LOG_FLUSH_INTERVAL)
+            self._log_wake.clear()
+            self._write_log_buf()
+
+    def _write_log_buf(self):
+        """Write all queued log entries to the file."""
+        with self._log_lock:
+            buf = self._log_buf
+            if not buf:
+                return
+            entries = [buf.popleft() for _ in range(len(buf))]
+            if self._log_fh is None:
+                self._log_fh = open(self.log_path, 'a', encoding='utf-8', buffering=64 * 1024)
+            self._log_fh.writelines([self._format_log_entry(*entry) for entry in entries])
+            self._log_fh.flush()
+
+    def flush_log(self):
+        """Write queued log entries and fsync (checkpoints and LOG_SYNC_EVENTS)."""
+        self._write_log_buf()
+        with self._log_lock:
+            if self._log_fh is not None:
+                os.fsync(self._log_fh.fileno())
+
+    def close_log(self):
+        """Stop the writer thread, write what is left and close the log."""
+        atexit.unregister(self.close_log)
+        self._log_stop.set()
+        self._log_wake.set()
+        if self._log_writer is not threading.current_thread():
+            self._log_writer.join(timeout=2)
+        self._write_log_buf()
+        with self._log_lock:
+            if self._log_fh is not None:
+                self._log_fh.close()
+                self._log_fh = None
     
     def start_exam_timer(self):
         """Start the exam timer when the exam begins, or resume from saved state."""
@@ -101,40 +378,49 @@ class ExamSession:
             else:
                 remaining_minutes = self.get_remaining_time().total_seconds() / 60
                 duration_log = f"{remaining_minutes:.1f} minutes remaining"
-            self.log("EXAM_RESUME", f"Exam resumed at {datetime.now().strftime('%H:%M:%S')}, {duration_log}")
+            self.log("EXAM_RESUME", f"Exam resumed at {time.strftime('%H:%M:%S')}, {duration_log}")
             return
 
         self.exam_start_time = datetime.now()
-        if self.config.exam_time_minutes == -1:
+        if self._exam_time_minutes == -1:
             self.exam_end_time = None  # No time limit
             duration_log = "infinite"
         else:
-            self.exam_end_time = self.exam_start_time + timedelta(minutes=self.config.exam_time_minutes)
-            duration_log = f"{self.config.exam_time_minutes} minutes"
+            self.exam_end_time = self.exam_start_time + timedelta(minutes=self._exam_time_minutes)
+            duration_log = f"{self._exam_time_minutes} minutes"
+        self._exam_end_epoch = self.exam_end_time.timestamp() if self.exam_end_time else None
 
+        self._timer_dirty = True
         self.save_timer_state()
         self.log("EXAM_START", f"Exam started at {self.exam_start_time.strftime('%H:%M:%S')}, duration: {duration_log}")
     
-    def get_remaining_time(self) -> timedelta:
-        """Get the remaining exam time as a timedelta."""
-        if self.exam_end_time is None:
+    def get_remaining_time(self, now: Optional[float] = None) -> timedelta:
+        """
+        Get the remaining exam time as a timedelta.
+
+        now is a time.time() value, letting callers share one clock reading.
+        """
+        if self._exam_end_epoch is None:
             return timedelta.max # Infinite time
         
-        remaining = self.exam_end_time - datetime.now()
-        return max(remaining, timedelta(0))
+        if now is None:
+            now = time.time()
+        return timedelta(seconds=max(self._exam_end_epoch - now, 0.0))
         
-    def is_time_expired(self) -> bool:
-        """Check if exam time has expired."""
-        if self.exam_end_time is None:
+    def is_time_expired(self, now: Optional[float] = None) -> bool:
+        """Check if exam time has expired (now as in get_remaining_time())."""
+        if self._exam_end_epoch is None:
             return False  # No time limit
-        return self.get_remaining_time() <= timedelta(0)
+        if now is None:
+            now = time.time()
+        return now >= self._exam_end_epoch
     
-    def format_remaining_time(self) -> str:
-        """Format remaining time as HH:MM:SS."""
+    def format_remaining_time(self, now: Optional[float] = None) -> str:
+        """Format remaining time as HH:MM:SS (now as in get_remaining_time())."""
         if self.exam_end_time is None:
             return "infinite"
 
-        remaining = self.get_remaining_time()
+        remaining = self.get_remaining_time(now)
         total_seconds = int(remaining.total_seconds())
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
@@ -142,18 +428,25 @@ class ExamSession:
         return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
     def save_timer_state(self):
-        """Save the current timer state to timer_state.json."""
+        """
+        Save the current timer state to timer_state.json.
+
+        The state only changes when the timer starts, so the file is written
+        then (or again if it went missing) and other calls return at once.
+        """
         if self.exam_start_time is None:
             return
+        if not self._timer_dirty and self.timer_state_path.exists():
+            return
 
         timer_data = {
-            "exam_start_time": self.exam_start_time.isoformat(),
-            "exam_end_time": self.exam_end_time.isoformat() if self.exam_end_time else None,
-            "exam_time_minutes": self.config.exam_time_minutes
+            "exam_start_epoch": self.exam_start_time.timestamp(),
+            "exam_end_epoch": self._exam_end_epoch,
+            "exam_time_minutes": self._exam_time_minutes
         }
 
-        with open(self.timer_state_path, 'w', encoding='utf-8') as f:
-            json.dump(timer_data, f, indent=2)
+        _write_json_atomic(self.timer_state_path, timer_data)
+        self._timer_dirty = False
 
     def load_timer_state(self) -> bool:
         """
@@ -162,22 +455,30 @@ class ExamSession:
         Returns:
             True if timer state was loaded and is valid, False otherwise
         """
-        if not self.timer_state_path.exists():
+        if self.timer_state_path.name not in self._resume_files:
             return False
-
         try:
-            with open(self.timer_state_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _json_loads(self.timer_state_path.read_bytes())
 
-            if data.get("exam_time_minutes") != self.config.exam_time_minutes:
+            if data.get("exam_time_minutes") != self._exam_time_minutes:
                 return False
 
-            self.exam_start_time = datetime.fromisoformat(data["exam_start_time"])
-            exam_end_time_str = data.get("exam_end_time")
-            if exam_end_time_str:
-                self.exam_end_time = datetime.fromisoformat(exam_end_time_str)
+            if "exam_start_epoch" in data:
+                self._exam_end_epoch = data.get("exam_end_epoch")
+                self.exam_start_time = datetime.fromtimestamp(data["exam_start_epoch"])
+                if self._exam_end_epoch is not None:
+                    self.exam_end_time = datetime.fromtimestamp(self._exam_end_epoch)
+                else:
+                    self.exam_end_time = None
             else:
-                self.exam_end_time = None
+                # Timer state written before epochs were stored
+                self.exam_start_time = datetime.fromisoformat(data["exam_start_time"])
+                exam_end_time_str = data.get("exam_end_time")
+                if exam_end_time_str:
+                    self.exam_end_time = datetime.fromisoformat(exam_end_time_str)
+                else:
+                    self.exam_end_time = None
+                self._exam_end_epoch = self.exam_end_time.timestamp() if self.exam_end_time else None
 
             if self.is_time_expired():
                 return False
@@ -198,8 +499,7 @@ class ExamSession:
             }
         }
         
-        with open(self.assignment_path, 'w', encoding='utf-8') as f:
-            json.dump(assignment_data, f, indent=2)
+        _write_json_atomic(self.assignment_path, assignment_data)
     
     def load_assignment(self) -> bool:
         """
@@ -208,35 +508,69 @@ class ExamSession:
         Returns:
             True if assignment was loaded, False otherwise
         """
-        if not self.assignment_path.exists():
+        if self.assignment_path.name not in self._resume_files:
             return False
-        
         try:
-            with open(self.assignment_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _json_loads(self.assignment_path.read_bytes())
             
             if data.get("name") != self.name or data.get("surname") != self.surname:
                 return False
             
-            all_tasks = self.bank.get_all_tasks()
+            all_tasks = self.bank.tasks_by_id
             assigned_task_ids = data.get("assigned_tasks", {})
             
             for qn, task_id in assigned_task_ids.items():
                 if task_id in all_tasks:
                     self.assigned_tasks[qn] = all_tasks[task_id]
             
-            return len(self.assigned_tasks) == self.config.total_questions
+            return len(self.assigned_tasks) == self._total_questions
         
         except Exception:
             return False
     
+    def record_submission(self, qn: str, submission: Dict):
+        """Store a graded submission, replacing any earlier one for the question."""
+        previous = self.submissions.get(qn)
+        if previous is not None:
+            self._total_score -= previous.get("score", 0.0)
+        else:
+            self._submitted_count += 1
+        self._total_score += submission.get("score", 0.0)
+        self.submissions[qn] = submission
+        self._failed_test_nums[qn] = [
+            r["test_num"] for r in submission.get("results", []) if r["status"] != "passed"
+        ]
+        self._results_dirty = True
+
+    def get_submitted_count(self) -> int:
+        """Return the number of questions that have a submission."""
+        return self._submitted_count
+
+    def code_sha256(self, code_file: str, st: Optional[os.stat_result] = None,
+                    refresh: bool = False) -> str:
+        """
+        Return the SHA-256 of a code file, reusing the last digest if the
+        file's mtime and size are unchanged since it was computed.
+
+        st may pass a fresh stat result of code_file to save another stat().
+        refresh=True always reads the file: an edit within the filesystem's
+        timestamp granularity can keep both mtime and size, so anything that
+        gets recorded as a submission must not trust the cached digest.
+        """
+        if st is None:
+            st = os.stat(code_file)
+        cached = self._code_hashes.get(code_file)
+        if (not refresh and cached is not None
+                and cached[0] == st.st_mtime_ns and cached[1] == st.st_size):
+            return cached[2]
+        
+        digest = _sha256_file(code_file)
+        self._code_hashes[code_file] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
     def get_total_score(self) -> float:
-        """Calculate total score from submissions."""
-        total = 0.0
-        for sub in self.submissions.values():
-            if sub is not None:
-                total += sub.get("score", 0.0)
-        return round(total, 2)
+        """Return the total score of the recorded submissions."""
+        return round(self._total_score, 2)
     
     def get_max_score(self) -> float:
         """Get the maximum possible score."""
@@ -244,71 +578,70 @@ class ExamSession:
     
     def generate_results_file(self):
         """Generate the human-readable results.txt file."""
-        lines = []
-        lines.append(f"Student: {self.student_name} | Group: {self.group} | Date: {datetime.now().strftime('%Y-%m-%d')}")
-        lines.append(f"Assigned: {', '.join(task.id for task in self.assigned_tasks.values())}\n")
-        
-        for i in range(self.config.total_questions):
-            qn = f"q{i+1}"
-            task = self.assigned_tasks.get(qn)
-            sub = self.submissions.get(qn)
+        # Nothing was submitted since the last write
+        if not self._results_dirty and self.results_path.exists():
+            return
+        with open(self.results_path, 'w', encoding='utf-8', buffering=64 * 1024) as f:
+            write = f.write
+            write(f"Student: {self.student_name} | Group: {self.group} | Date: {datetime.now().strftime('%Y-%m-%d')}\n")
+            write(f"Assigned: {', '.join(task.id for task in self.assigned_tasks.values())}\n\n")
             
-            if task:
-                lines.append(f"[{qn}: {task.id}]", )
+            for qn in self.qns:
+                task = self.assigned_tasks.get(qn)
+                sub = self.submissions.get(qn)
                 
-                if sub:
-                    timestamp = sub.get("timestamp", "N/A")
-                    score = sub.get("score", 0.0)
-                    passed = sub.get("passed", 0)
-                    total = sub.get("total", 15)
-                    sha256 = sub.get("code_sha256", "N/A")
-                    max_score = sub.get("max_score", 0.0)
+                if task:
+                    write(f"[{qn}: {task.id}]\n")
                     
-                    lines.append(f"  SUBMITTED @ {timestamp}")
-                    lines.append(f"  - Score: {score:.2f} / {max_score:.2f} ({passed}/{total} passed)")
-
-                    # List failed test numbers
-                    results = sub.get("results", [])
-                    failed_nums = [r["test_num"] for r in results if r["status"] != "passed"]
-                    if failed_nums:
-                        lines.append(f"  - Failed cases: {', '.join(f'#{n}' for n in failed_nums)}")
+                    if sub:
+                        # Submissions are always recorded with every key the template uses
+                        write(_RESULTS_SUBMITTED_TMPL.format_map(sub))
+
+                        # List failed test numbers
+                        failed_nums = self._failed_test_nums.get(qn)
+                        if failed_nums:
+                            write(f"  - Failed cases: {', '.join(f'#{n}' for n in failed_nums)}\n")
+                        
+                        sha256 = sub["code_sha256"]
+                        write(f"  - SHA256({qn}.py): {sha256[:8]}...{sha256[-4:]}\n")
+                    else:
+                        write("  NOT SUBMITTED\n")
                     
-                    lines.append(f"  - SHA256({qn}.py): {sha256[:8]}...{sha256[-4:]}")
-                else:
-                    lines.append(f"  NOT SUBMITTED")
-                
-                lines.append("")
-        
-        lines.append(f"TOTAL SCORE: {self.get_total_score():.2f} / {self.get_max_score():.2f}")
-        
-        with open(self.results_path, 'w', encoding='utf-8') as f:
-            f.write("\n".join(lines))
+                    write("\n")
+            
+            write(f"TOTAL SCORE: {self.get_total_score():.2f} / {self.get_max_score():.2f}")
+        self._results_dirty = False
     
     def create_submission_zip(self) -> Path:
         """Create the final submission ZIP file in root folder."""
-        safe_name = "".join(c if c.isalnum() else '_' for c in self.name.upper())
-        safe_surname = "".join(c if c.isalnum() else '_' for c in self.surname.upper())
-        
-        zip_filename = f"{safe_name}_{safe_surname}_{self.config.work_dir_postfix.upper()}.zip"
+        zip_filename = (f"{self.safe_name.upper()}_{self.safe_surname.upper()}_"
+                        f"{self.config.work_dir_postfix.upper()}.zip")
         zip_path = self.work_dir.parent / zip_filename
 
+        # One directory listing instead of an exists() probe per candidate file
+        with os.scandir(self.work_dir) as it:
+            present = {entry.name: entry for entry in it}
+
         files_to_zip = [
-            "assignment.json",
-            "session.log",
-            "results.txt",
-            "algorithm.txt"
+            filename for filename in (
+                "assignment.json",
+                "session.log",
+                "results.txt",
+                "algorithm.txt"
+            ) if filename in present
         ]
 
-        for i in range(self.config.total_questions):
-            code_file = f"q{i+1}.py"
-            if (self.work_dir / code_file).exists():
+        for code_file in self.code_files.values():
+            if code_file in present:
                 files_to_zip.append(code_file)
         
-        with ZipFile(zip_path, 'w', ZIP_DEFLATED) as zipf:
+        with ZipFile(zip_path, 'w', ZIP_STORED, compresslevel=1) as zipf:
             for filename in files_to_zip:
-                file_path = self.work_dir / filename
-                if file_path.exists():
-                    zipf.write(file_path, arcname=filename)
+                if present[filename].stat().st_size > ZIP_DEFLATE_MIN_SIZE:
+                    compress_type = ZIP_DEFLATED
+                else:
+                    compress_type = ZIP_STORED
+                zipf.write(self.work_dir / filename, arcname=filename, compress_type=compress_type)
         
         return zip_path
 
@@ -323,12 +656,27 @@ class ExamRunner:
         self.session: Optional[ExamSession] = None
         self.config: Optional[ExamConfig] = None
         self.time_expired_warning_shown = False
+        self._timer_stop = threading.Event()
+        self._expiry_alarm: Optional[threading.Timer] = None  # see _arm_expiry_alarm()
+        self._help_text: Optional[str] = None  # built on first use, see cmd_help()
+        self._code_file_observer = None
+        self._code_file_events: Optional[queue.SimpleQueue] = None
+        # qN -> (SHA-256 of the graded file, grader results), see _grade()
+        self._grade_cache: Dict[str, Tuple[str, Dict]] = {}
+        # Network monitor log entries not yet handed to the session log
+        self._net_log_pending: List[Tuple[float, str, str]] = []
+        self._net_log_lock = threading.Lock()
+        self._net_log_flushed = time.monotonic()
 
         self.language = "en"
         self.messages = TRANSLATIONS["en"]
 
     def _msg(self, key: str, **kwargs) -> str:
         template = self.messages.get(key, key)
+        # Most messages are plain text; only run the format parser when the
+        # template has placeholders (or escaped braces) to process
+        if not kwargs and "{" not in template and "}" not in template:
+            return template
         return template.format(**kwargs)
 
     def _prompt_language(self) -> str:
@@ -347,14 +695,7 @@ class ExamRunner:
     
     def derive_key_from_password(self, password: str, salt: bytes) -> bytes:
         """Derive a Fernet key from a password using PBKDF2."""
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=480000,  # OWASP recommendation for 2024
-        )
-        key_material = kdf.derive(password.encode('utf-8'))
-        return base64.urlsafe_b64encode(key_material)
+        return _pbkdf2_fernet_key(password, salt)
  
     def load_bank(self, key_input: Optional[str]) -> bool:
         """
@@ -370,8 +711,7 @@ class ExamRunner:
         """
         try:
             if self.bank_path.suffix.lower() == '.json':
-                with open(self.bank_path, 'r', encoding='utf-8') as f:
-                    raw_bank = json.load(f)
+                raw_bank = _json_loads(self.bank_path.read_bytes())
                 if self._bank_has_translations(raw_bank):
                     self.available_languages = [k for k in raw_bank.keys() if k in TRANSLATIONS]
                     self.language = self._prompt_language()
@@ -380,14 +720,19 @@ class ExamRunner:
                 self.bank = Bank.from_dict(bank_dict)
                 return True
 
+            # Read the header separately so the ciphertext is pulled in with
+            # a single allocation instead of being read and then sliced.
             with open(self.bank_path, 'rb') as f:
-                encrypted_data = f.read()
-            
-            is_password_based = encrypted_data.startswith(b'SALT')
+                prefix = f.read(4)
+                is_password_based = prefix == b'SALT'
+                if is_password_based:
+                    salt = f.read(16)  # 4-byte prefix + 16-byte salt
+                    encrypted_data = f.read()
+                else:
+                    f.seek(0)
+                    encrypted_data = f.read()
             
             if is_password_based:                
-                salt = encrypted_data[4:20]  # 4-byte prefix + 16-byte salt
-                encrypted_data = encrypted_data[20:]
                 key = self.derive_key_from_password(key_input, salt)
             else:
                 try:
@@ -395,9 +740,11 @@ class ExamRunner:
                 except:
                     key = key_input
 
+            # Imported here so .json banks never load the OpenSSL bindings
+            from cryptography.fernet import Fernet
             fernet = Fernet(key)
             decrypted_data = fernet.decrypt(encrypted_data)
-            bank_dict = json.loads(decrypted_data)
+            bank_dict = _json_loads(decrypted_data)
 
             if "config" in bank_dict and "bank" in bank_dict:
                 raw_bank = bank_dict["bank"]
@@ -428,7 +775,7 @@ class ExamRunner:
     def _bank_has_translations(self, bank_dict: dict) -> bool:
         if not isinstance(bank_dict, dict):
             return False
-        return any(lang in bank_dict for lang in TRANSLATIONS.keys())
+        return not _LANGUAGE_CODES.isdisjoint(bank_dict)
 
     def _resolve_bank_path(self, banks_dir: Path, bank_arg: str) -> Optional[Path]:
         """
@@ -461,12 +808,11 @@ class ExamRunner:
             return bank_dict
 
         # Format: metadata + language keys at top level (e.g., "en": {...}, "fr": {...})
-        if any(lang in bank_dict for lang in TRANSLATIONS.keys()):
-            lang_data = bank_dict.get(self.language)
+        lang_data = bank_dict.get(self.language)
+        if lang_data or not _LANGUAGE_CODES.isdisjoint(bank_dict):
             if not lang_data:
                 raise ValueError(f"Language '{self.language}' not found in bank.")
-            meta_keys = {"group", "version", "network_monitoring", "ai_detection"}
-            merged = {k: v for k, v in bank_dict.items() if k in meta_keys}
+            merged = {k: v for k, v in bank_dict.items() if k in _BANK_META_KEYS}
             merged.update(lang_data)
             return merged
 
@@ -496,18 +842,18 @@ class ExamRunner:
                 return False
             
             # Create working directory: name_surname_postfix (lowercase)
-            safe_name = "".join(c if c.isalnum() else '_' for c in name.lower())
-            safe_surname = "".join(c if c.isalnum() else '_' for c in surname.lower())
+            safe_name = _safe_name(name.lower())
+            safe_surname = _safe_name(surname.lower())
             work_dir_name = f"{safe_name}_{safe_surname}_{self.config.work_dir_postfix.upper()}"
             work_dir = Path.cwd() / work_dir_name
             
-            if work_dir.exists():
+            try:
+                work_dir.mkdir()
+            except FileExistsError:
                 resume = input(self._msg("resume_prompt")).strip().lower()
                 if resume != 'y':
                     print(self._msg("resume_abort"))
                     return False
-            else:
-                work_dir.mkdir(exist_ok=True)
             
             self.session = ExamSession(
                 name=name,
@@ -526,13 +872,20 @@ class ExamRunner:
             self.session.log("SESSION_START", f"Student: {surname}, {name}, Group: {self.group}")
             
             algo_file = work_dir / "algorithm.txt"
-            if not algo_file.exists():
-                with open(algo_file, 'w', encoding='utf-8') as f:
-                    f.write(f"{self._msg('algo_desc')}\n\n")
-                    f.write(f"{self._msg('algo_desc_approach')}\n\n")
-                    for qn, task in self.session.assigned_tasks.items():
-                        f.write(f"## {qn.upper()}: {task.title} ({task.id})\n\n")
-                        f.write(f"{self._msg('algo_approach')}\n\n\n")
+            algo_approach = f"{self._msg('algo_approach')}\n\n\n"
+            sections = [
+                f"{self._msg('algo_desc')}\n\n",
+                f"{self._msg('algo_desc_approach')}\n\n",
+            ]
+            for qn, task in self.session.assigned_tasks.items():
+                sections.append(f"## {qn.upper()}: {task.title} ({task.id})\n\n")
+                sections.append(algo_approach)
+            try:
+                # 'x' creates the template only if the student has none yet
+                with open(algo_file, 'x', encoding='utf-8') as f:
+                    f.write("".join(sections))
+            except FileExistsError:
+                pass
             
             print(f"\n{self._msg('auth_success', surname=surname, name=name)}")
             print(f"✓ {self._msg('workdir', path=work_dir)}")
@@ -552,30 +905,17 @@ class ExamRunner:
         # Seed based on name, surname and group
         exam_date = datetime.now().strftime("%Y-%m-%d")
         seed_string = f"{self.session.name.lower()}{self.session.surname.lower()}{self.group}{exam_date}"
-        seed_hash = hashlib.sha256(seed_string.encode()).hexdigest()
-        seed = int(seed_hash, 16)
-        random.seed(seed)
-        
-        tasks_to_assign = []
+        seed = int.from_bytes(hashlib.blake2b(seed_string.encode('utf-8'), digest_size=8).digest(), 'little')
+        rng = random.Random(seed)
 
-        shuffled_easy = self.bank.easy.copy()
-        random.shuffle(shuffled_easy)
-        for i in range(self.config.easy_count):
-            tasks_to_assign.append(("easy", shuffled_easy[i]))
-        
-        shuffled_medium = self.bank.medium.copy()
-        random.shuffle(shuffled_medium)
-        for i in range(self.config.medium_count):
-            tasks_to_assign.append(("medium", shuffled_medium[i]))
-
-        shuffled_hard = self.bank.hard.copy()
-        random.shuffle(shuffled_hard)
-        for i in range(self.config.hard_count):
-            tasks_to_assign.append(("hard", shuffled_hard[i]))
+        tasks_to_assign = (
+            [("easy", task) for task in rng.sample(self.bank.easy, self.config.easy_count)]
+            + [("medium", task) for task in rng.sample(self.bank.medium, self.config.medium_count)]
+            + [("hard", task) for task in rng.sample(self.bank.hard, self.config.hard_count)]
+        )
         
         self.session.assigned_tasks = {}
-        for i, (_, task) in enumerate(tasks_to_assign):
-            qn = f"q{i+1}"
+        for qn, (_, task) in zip(self.session.qns, tasks_to_assign):
             self.session.assigned_tasks[qn] = task
     
     def run(self):
@@ -640,6 +980,14 @@ class ExamRunner:
         print(self._msg("bank_group", group=self.group))
         print(f"{self._msg('language_confirm')}{self.messages.get('language_name', self.language)}")
         
+        # The AI tool scan doesn't depend on the network check; start it now so
+        # startup waits for the slower of the two rather than both in turn
+        ai_check = None
+        if self.bank.ai_detection.enabled:
+            startup_checks = ThreadPoolExecutor(max_workers=1)
+            ai_check = startup_checks.submit(check_ai_tools_at_startup)
+            startup_checks.shutdown(wait=False)
+        
         if self.bank.network_monitoring.enabled:
             print(self._msg("network_on", interval=self.bank.network_monitoring.check_interval_seconds))
             print(f"\n{self._msg('network_check')}")
@@ -660,7 +1008,7 @@ class ExamRunner:
         if self.bank.ai_detection.enabled:
             print(f"✓ {self._msg('ai_on', interval=self.bank.ai_detection.check_interval_seconds)}")
             print(f"\n{self._msg('ai_check')}")
-            ai_detected, ai_tools = check_ai_tools_at_startup()
+            ai_detected, ai_tools = ai_check.result()
             if ai_detected:
                 tool_list = ", ".join(ai_tools)
                 print("\n" + "!"*70)
@@ -703,14 +1051,18 @@ class ExamRunner:
         # Start network monitoring
         if self.bank.network_monitoring.enabled:
             self.network_monitor_active = True
+            # Owned here so the cleanup below can cut the thread's waits short
+            network_watcher = NetworkChangeWatcher()
             self.network_thread = threading.Thread(
                 target=self._monitor_network_background,
+                args=(network_watcher,),
                 daemon=True
             )
             self.network_thread.start()
         else:
             self.network_monitor_active = False
             self.network_thread = None
+            network_watcher = None
 
         # Start AI monitoring
         if self.bank.ai_detection.enabled:
@@ -724,50 +1076,56 @@ class ExamRunner:
 
         # Start exam timer
         if self.config.exam_time_minutes != -1:
-            self.exam_timer_active = True
-            self.exam_timer_thread = threading.Thread(
-                target=self._monitor_exam_timer,
-                daemon=True
-            )
-            self.exam_timer_thread.start()
-        else:
-            self.exam_timer_active = False
-            self.exam_timer_thread = None
+            self._arm_expiry_alarm()
 
         try:
             self.command_loop()
         finally:
             # Stop timer monitoring
-            self.exam_timer_active = False
-            if self.exam_timer_thread and self.exam_timer_thread.is_alive():
-                self.exam_timer_thread.join(timeout=1.0)
+            self._timer_stop.set()
+            if self._expiry_alarm is not None:
+                self._expiry_alarm.cancel()
             # Stop network monitoring
             if self.network_monitor_active:
                 self.network_monitor_active = False
+                network_watcher.interrupt()
                 if self.network_thread and self.network_thread.is_alive():
                     self.network_thread.join(timeout=1.0)           
+            self._flush_network_log()
             # Stop AI monitoring
             if self.ai_monitor_active and self.ai_detector:
                 self.ai_detector.stop_monitoring()
                 self.ai_monitor_active = False
+            self._stop_code_file_observer()
+            self.session.close_log()
         
         return 0
     
-    def _monitor_exam_timer(self):
-        """Background thread to monitor exam time and auto-finish when expired."""
-        while self.exam_timer_active and not self.session.is_finished:
-            if self.session.is_time_expired():
-                
-                self.time_expired_warning_shown = True
-                self.session.log("EXAM_TIMEOUT", "Exam time finished - auto-stopping")
-                break
-            
-            time.sleep(1)  # Check every second
+    def _arm_expiry_alarm(self):
+        """Schedule _on_exam_expired() to run once at the exam deadline."""
+        remaining = self.session.get_remaining_time().total_seconds()
+        self._expiry_alarm = threading.Timer(remaining, self._on_exam_expired)
+        self._expiry_alarm.daemon = True
+        self._expiry_alarm.start()
+
+    def _on_exam_expired(self):
+        """Alarm callback: flag the timeout so the command loop auto-finishes."""
+        session = self.session
+        if self._timer_stop.is_set() or session.is_finished:
+            return
+        if not session.is_time_expired():
+            # The wall clock was set back after the alarm was armed
+            self._arm_expiry_alarm()
+            return
+        self.time_expired_warning_shown = True
+        session.log("EXAM_TIMEOUT", "Exam time finished - auto-stopping")
     
     def _auto_finish_exam(self):
         """Automatically finish the exam when time expires."""
         try:
             self._auto_submit_all_questions()
+            self._flush_network_log()
+            self.session.flush_log()
             self.session.generate_results_file()
             zip_path = self.session.create_submission_zip()
             self.session.log("SESSION_FINISH_TIMEOUT", f"Total Score: {self.session.get_total_score():.2f}")
@@ -783,29 +1141,63 @@ class ExamRunner:
         """Auto-submit all questions that haven't been submitted yet."""
         submitted_count = 0
         
-        for i in range(self.session.config.total_questions):
-            qn = f"q{i+1}"
+        pending = []
+        for qn in self.session.qns:
             task = self.session.assigned_tasks.get(qn)
             if not task or self.session.submissions.get(qn) is not None:
                 continue
             
-            code_file = Path(f"{qn}.py")
-            if not code_file.exists():
+            code_st = self._stat_code_file(qn)
+            if code_st is None:
                 print(f"Warning: {qn}.py not found, skipping submission")
                 continue
             
             print(self._msg('auto_submit', qn=qn))
-
-            results = self.session.grader.grade_submission(task, str(code_file))
+            pending.append((qn, task, self.session.code_files[qn], code_st))
+        
+        # Files graded earlier and unchanged since reuse those results
+        graded = {}
+        to_grade = []
+        hashes = {}
+        for qn, task, code_file, code_st in pending:
+            code_sha256 = self.session.code_sha256(code_file, code_st, refresh=True)
+            hashes[qn] = code_sha256
+            cached = self._grade_cache.get(qn)
+            if cached is not None and cached[0] == code_sha256:
+                graded[qn] = cached[1]
+            else:
+                to_grade.append((qn, task, code_file, code_sha256))
+        
+        # Each question is graded in its own sandbox subprocesses, so the
+        # questions can run side by side; threads are enough to overlap them.
+        grade_submission = self.session.grader.grade_submission
+        if len(to_grade) == 1:
+            # Nothing to overlap, skip the pool
+            qn, task, code_file, code_sha256 = to_grade[0]
+            graded[qn] = grade_submission(task, code_file)
+            self._grade_cache[qn] = (code_sha256, graded[qn])
+        elif to_grade:
+            with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(to_grade))) as executor:
+                # Tests run serially within each question so at most
+                # cpu_count sandbox processes compete for CPU against the
+                # wall-clock test limits (nested pools would give ~cpu_count²)
+                futures = [
+                    executor.submit(grade_submission, task, code_file, parallel_tests=False)
+                    for _, task, code_file, _ in to_grade
+                ]
+            for (qn, _, _, code_sha256), future in zip(to_grade, futures):
+                graded[qn] = future.result()
+                self._grade_cache[qn] = (code_sha256, graded[qn])
+        
+        for qn, task, code_file, code_st in pending:
+            results = graded[qn]
             
-            with open(code_file, 'rb') as f:
-                code_bytes = f.read()
-            code_sha256 = hashlib.sha256(code_bytes).hexdigest()
+            code_sha256 = hashes[qn]
             
             max_score = results.get("max_score", 0.0)
             
             timestamp = datetime.now().strftime("%H:%M:%S")
-            self.session.submissions[qn] = {
+            self.session.record_submission(qn, {
                 "task_id": task.id,
                 "score": results["score"],
                 "passed": results["passed"],
@@ -814,7 +1206,7 @@ class ExamRunner:
                 "results": results["results"],
                 "code_sha256": code_sha256,
                 "timestamp": timestamp
-            }
+            })
             
             self.session.log(
                 "AUTO_SUBMISSION",
@@ -828,54 +1220,100 @@ class ExamRunner:
         else:
             print(self._msg('qn_already_submit'))
     
-    def _monitor_network_background(self):
-        """Background network monitoring thread."""
-        last_check_time = time.time()
+    def _monitor_network_background(self, watcher: NetworkChangeWatcher):
+        """Background network monitoring thread (closes watcher when done)."""
         # Use check interval from bank configuration
         check_interval = self.bank.network_monitoring.check_interval_seconds
         check_count = 0
+        last_status = None
         
-        while self.network_monitor_active:
-            current_time = time.time()
-            if current_time - last_check_time >= check_interval:
+        # Sleeps until a link/address change is reported (Linux netlink), the
+        # check interval elapses or run() interrupts the watcher on shutdown.
+        try:
+            while self.network_monitor_active:
+                watcher.wait(check_interval)
+                if not self.network_monitor_active:
+                    break
+                
                 check_count += 1
                 has_connectivity = check_internet_connectivity()
                 
                 # Log every connectivity check (whether connected or not)
                 status = "CONNECTED" if has_connectivity else "OFFLINE"
-                self.session.log("NETWORK_CHECK", f"Check #{check_count}: Internet status = {status}")
+                self._log_network("NETWORK_CHECK", f"Check #{check_count}: Internet status = {status}",
+                                  flush=status != last_status)
+                last_status = status
                 
                 if has_connectivity:
-                    self._handle_network_detected()
-                    last_check_time = current_time
-                else:
-                    last_check_time = current_time
-            time.sleep(1)  # Avoid busy waiting
+                    self._handle_network_detected(watcher)
+                    last_status = "OFFLINE"
+        finally:
+            watcher.close()
+            self._flush_network_log()
     
-    def _handle_network_detected(self):
+    def _log_network(self, event: str, details: str, flush: bool = False):
+        """
+        Queue a network monitor log entry.
+
+        Routine checks are handed to the session log in bulk; `flush` forces
+        the pending entries out immediately (used on status changes).
+        """
+        with self._net_log_lock:
+            self._net_log_pending.append((time.time(), event, details))
+            if not (flush
+                    or len(self._net_log_pending) >= NETWORK_LOG_BATCH_SIZE
+                    or time.monotonic() - self._net_log_flushed >= NETWORK_LOG_FLUSH_INTERVAL):
+                return
+        self._flush_network_log()
+    
+    def _flush_network_log(self):
+        """Hand all pending network monitor entries to the session log."""
+        with self._net_log_lock:
+            entries, self._net_log_pending = self._net_log_pending, []
+            self._net_log_flushed = time.monotonic()
+        if entries:
+            self.session.log_entries(entries)
+    
+    def _handle_network_detected(self, watcher: NetworkChangeWatcher):
         """Handle when network connectivity is detected during exam."""
-        print("\n" + "!"*60)
-        print(f"⚠️  {self._msg('network_detected_exam')} ⚠️")
-        print(self._msg("network_instructions_exam_1"))
-        print(self._msg("network_instructions_2"))
-        print(self._msg("network_instructions_exam_3"))
-        print("!"*60)
-        
-        self.session.log("NETWORK_DETECTED", "Internet connection detected during exam - exam paused")
-        
-        # Wait for network to go offline
-        wait_count = 0
-        while check_internet_connectivity():
-            wait_count += 1
-            time.sleep(2)
-            print(self._msg("network_still_detected_exam"))
+        print("\n".join((
+            "\n" + "!"*60,
+            f"⚠️  {self._msg('network_detected_exam')} ⚠️",
+            self._msg("network_instructions_exam_1"),
+            self._msg("network_instructions_2"),
+            self._msg("network_instructions_exam_3"),
+            "!"*60,
+        )))
+        
+        self._log_network("NETWORK_DETECTED", "Internet connection detected during exam - exam paused", flush=True)
+        
+        # Wait for network to go offline, re-probing as soon as a link/address
+        # change is reported, otherwise with an exponential backoff
+        if watcher.is_event_driven:
+            max_delay = NETWORK_RECHECK_MAX_DELAY
+        else:
+            max_delay = NETWORK_RECHECK_MAX_DELAY_POLLING
+        started = time.monotonic()
+        next_log_after = 10
+        delay = 1.0
+        still_detected = self._msg("network_still_detected_exam")
+        while self.network_monitor_active and check_internet_connectivity():
+            if watcher.wait(delay):
+                delay = 1.0
+            else:
+                delay = min(delay * 2, max_delay)
+            print(still_detected)
             # Log every 10 seconds of waiting
-            if wait_count % 5 == 0:  # Every 10 seconds
-                self.session.log("NETWORK_WAITING", f"Still connected after {wait_count * 2} seconds")
+            waited = int(time.monotonic() - started)
+            if waited >= next_log_after:
+                self._log_network("NETWORK_WAITING", f"Still connected after {waited} seconds")
+                next_log_after = (waited // 10 + 1) * 10
+        if not self.network_monitor_active:
+            return  # exam is shutting down
         
         print(f"\n✓ {self._msg('network_disconnected_exam')}")
         print(self._msg("network_disconnected_con"))
-        self.session.log("NETWORK_DISCONNECTED", "Internet connection removed - exam resumed")
+        self._log_network("NETWORK_DISCONNECTED", "Internet connection removed - exam resumed", flush=True)
     
     def command_loop(self):
         """Main interactive command loop."""
@@ -883,19 +1321,37 @@ class ExamRunner:
         print(self._msg("cmd_help_text"))
         print(self._msg("header") + "\n")
 
-        # Track file modification times for copy-paste detection
+        # Track file modification times and sizes for copy-paste detection
         self.file_mod_times = {}
-        for i in range(self.session.config.total_questions):
-            qn = f"q{i+1}"
-            code_file = Path(f"{qn}.py")
-            if code_file.exists():
-                self.file_mod_times[qn] = code_file.stat().st_mtime
+        self.file_sizes = {}
+        for qn, code_st in self._scan_code_files().items():
+            self.file_mod_times[qn] = code_st.st_mtime
+            self.file_sizes[qn] = code_st.st_size
+        self._start_code_file_observer()
+        
+        # Command routing tables: plain commands, and commands taking a
+        # question name (with the message shown when it is missing)
+        commands = {
+            'exit': self.cmd_exit,
+            'quit': self.cmd_exit,
+            'finish': self.cmd_finish,
+            'help': self.cmd_help,
+            'status': self.cmd_status,
+            'time': self.cmd_time,
+        }
+        question_commands = {
+            'test': (self.cmd_test, "cmd_test_usage"),
+            'debug': (self.cmd_debug, "cmd_debug_usage"),
+            'hint': (self.cmd_hint, "cmd_hint_usage"),
+            'submit': (self.cmd_submit, "cmd_submit_usage"),
+        }
+        
+        # On a POSIX terminal the prompt waits in select() so the deadline is
+        # noticed while the student is idle; elsewhere input() just blocks.
+        stdin_selectable = os.name == 'posix' and sys.stdin.isatty()
         
         while not self.session.is_finished:
             try:
-                # Save timer state periodically
-                self.session.save_timer_state()
-
                 # Check if time has expired and show warning
                 if self.time_expired_warning_shown and not self.session.is_finished:
                     print("\n" + "!"*60)
@@ -924,7 +1380,13 @@ class ExamRunner:
                     self._auto_finish_exam()
                     break
 
-                cmd_line = input("exam> ").strip()
+                if stdin_selectable:
+                    cmd_line = self._wait_for_command("exam> ")
+                    if cmd_line is None:
+                        continue  # time ran out while waiting, handled above
+                else:
+                    cmd_line = input("exam> ")
+                cmd_line = cmd_line.strip()
                 if not cmd_line:
                     continue
 
@@ -938,38 +1400,17 @@ class ExamRunner:
                 self.session.log("COMMAND_RUN", f"Command: {cmd_line}")
                 
                 # Route command
-                if command in ['exit', 'quit']:
-                    self.cmd_exit()
-                elif command == 'finish':
-                    self.cmd_finish()
-                elif command == 'help':
-                    self.cmd_help()
-                elif command in [f'q{i+1}' for i in range(self.session.config.total_questions)]:
+                handler = commands.get(command)
+                if handler is not None:
+                    handler()
+                elif command in self.session.qn_set:
                     self.cmd_show_question(command)
-                elif command == 'test':
-                    if len(parts) < 2:
-                        print(self._msg("cmd_test_usage"))
-                    else:
-                        self.cmd_test(parts[1].lower())
-                elif command == 'debug':
+                elif command in question_commands:
+                    handler, usage_key = question_commands[command]
                     if len(parts) < 2:
-                        print(self._msg("cmd_debug_usage"))
+                        print(self._msg(usage_key))
                     else:
-                        self.cmd_debug(parts[1].lower())
-                elif command == 'hint':
-                    if len(parts) < 2:
-                        print(self._msg("cmd_hint_usage"))
-                    else:
-                        self.cmd_hint(parts[1].lower())
-                elif command == 'submit':
-                    if len(parts) < 2:
-                        print(self._msg("cmd_submit_usage"))
-                    else:
-                        self.cmd_submit(parts[1].lower())
-                elif command == 'status':
-                    self.cmd_status()
-                elif command == 'time':
-                    self.cmd_time()
+                        handler(parts[1].lower())
                 else:
                     print(self._msg("cmd_unknown", command=command))
             
@@ -979,62 +1420,181 @@ class ExamRunner:
                 print(f"An unexpected error occurred: {e}")
                 self.session.log("ERROR", str(e))
     
+    def _wait_for_command(self, prompt: str) -> Optional[str]:
+        """
+        Show the prompt and wait for a line on stdin (a POSIX tty).
+
+        Returns None without reading anything if the exam time runs out first.
+        """
+        print(prompt, end="", flush=True)
+        session = self.session
+        while True:
+            if self.time_expired_warning_shown or session.is_time_expired():
+                print()
+                return None
+            
+            if session.exam_end_time is None:
+                timeout = None
+            else:
+                # Wake just after the deadline; cap the wait in case the clock jumps
+                timeout = min(30.0, session.get_remaining_time().total_seconds() + 0.05)
+            readable, _, _ = select.select([sys.stdin], [], [], timeout)
+            if readable:
+                return input()
+
+    def _start_code_file_observer(self):
+        """Watch the work dir for writes to qN.py files, when watchdog is available."""
+        if Observer is None:
+            return
+        events = queue.SimpleQueue()
+        observer = Observer()
+        observer.daemon = True
+        try:
+            observer.schedule(_CodeFileEventHandler(self.session.qns, events), os.getcwd())
+            observer.start()
+        except OSError:
+            # e.g. inotify watch limit reached - keep polling instead
+            return
+        self._code_file_observer = observer
+        self._code_file_events = events
+
+    def _stop_code_file_observer(self):
+        if self._code_file_observer is not None:
+            self._code_file_observer.stop()
+            self._code_file_observer.join(timeout=1.0)
+            self._code_file_observer = None
+
     def _check_file_modifications(self):
         """Check if code files have been modified (for copy-paste detection)."""
-        for i in range(self.session.config.total_questions):
-            qn = f"q{i+1}"
-            code_file = Path(f"{qn}.py")
+        if self._code_file_events is None:
+            code_stats = self._scan_code_files()
+        else:
+            # Only stat the files the observer reported as written
+            changed = set()
+            try:
+                while True:
+                    changed.add(self._code_file_events.get_nowait())
+            except queue.Empty:
+                pass
+            if not changed:
+                return
+            code_stats = {}
+            for qn in self.session.qns:
+                if qn in changed:
+                    code_st = self._stat_code_file(qn)
+                    if code_st is not None:
+                        code_stats[qn] = code_st
+        
+        for qn, code_st in code_stats.items():
+            current_mtime = code_st.st_mtime
+            last_mtime = self.file_mod_times.get(qn, 0)
             
-            if code_file.exists():
-                current_mtime = code_file.stat().st_mtime
-                last_mtime = self.file_mod_times.get(qn, 0)
+            if current_mtime != last_mtime:
+                # File was modified
+                size_diff = code_st.st_size
+                if last_mtime > 0:  # Not the first check
+                    size_increase = size_diff - self.file_sizes.get(qn, 0)
+                    if size_increase > 200:  # Large addition
+                        self.session.log("LARGE_CODE_ADDITION", 
+                                       f"Question {qn}: +{size_increase} bytes added rapidly")
                 
-                if current_mtime != last_mtime:
-                    # File was modified
-                    size_diff = code_file.stat().st_size
-                    if last_mtime > 0:  # Not the first check
-                        size_increase = size_diff - (self.file_sizes.get(qn, 0) if hasattr(self, 'file_sizes') else 0)
-                        if size_increase > 200:  # Large addition
-                            self.session.log("LARGE_CODE_ADDITION", 
-                                           f"Question {qn}: +{size_increase} bytes added rapidly")
-                    
-                    self.file_mod_times[qn] = current_mtime
-                    if not hasattr(self, 'file_sizes'):
-                        self.file_sizes = {}
-                    self.file_sizes[qn] = size_diff
+                self.file_mod_times[qn] = current_mtime
+                self.file_sizes[qn] = size_diff
+                
+                # Hash the new version now, so submitting it (or the
+                # auto-submit at the deadline) finds the digest cached
+                try:
+                    self.session.code_sha256(self.session.code_files[qn], code_st)
+                except OSError:
+                    pass  # removed again since the stat
+
+    def _scan_code_files(self) -> Dict[str, os.stat_result]:
+        """
+        Stat every existing qN.py with one directory listing, in question order.
+
+        Missing files cost nothing, unlike a stat() per question.
+        """
+        found = {}
+        qn_set = self.session.qn_set
+        with os.scandir('.') as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith('.py') and name[:-3] in qn_set and entry.is_file():
+                    found[name[:-3]] = entry.stat()
+        return {qn: found[qn] for qn in self.session.qns if qn in found}
+
+    def _stat_code_file(self, qn: str) -> Optional[os.stat_result]:
+        """Stat qN.py in one syscall; None if the file doesn't exist."""
+        try:
+            return os.stat(self.session.code_files[qn])
+        except FileNotFoundError:
+            return None
+
+    def _grade(self, qn: str, task: Task, code_st: os.stat_result, use_cache: bool = True,
+               code_sha256: Optional[str] = None) -> Dict:
+        """
+        Grade qN.py, reusing the last results if its content hasn't changed.
+
+        code_st is the file's stat result from _stat_code_file(). The cache is
+        keyed by the file's SHA-256, so a file that was saved again without
+        edits is not re-run either. test/debug pass use_cache=False so an
+        explicit re-run always executes the tests; their results still
+        refresh the cache for hint/submit. submit passes code_sha256 read
+        fresh from the file, so the cache is only hit when the content it
+        records really matches.
+        """
+        code_file = self.session.code_files[qn]
+        if code_sha256 is None:
+            code_sha256 = self.session.code_sha256(code_file, code_st)
+        cached = self._grade_cache.get(qn) if use_cache else None
+        if cached is not None and cached[0] == code_sha256:
+            results = cached[1]
+        else:
+            results = self.session.grader.grade_submission(task, code_file)
+            self._grade_cache[qn] = (code_sha256, results)
+        
+        # Lets cmd_hint answer a locked request without hashing the file
+        total = results['total']
+        self.session.last_pass_rate[qn] = (
+            code_st.st_mtime_ns, results['passed'] / total if total > 0 else 0.0
+        )
+        return results
 
     def cmd_help(self):
         """Display help message."""
         # Generate question list dynamically
-        question_list = ", ".join([f"q{i+1}" for i in range(self.session.config.total_questions)])
-        print(self._msg("cmd_help", questions=question_list))
+        # Language and questions are fixed once the session exists
+        if self._help_text is None:
+            self._help_text = self._msg("cmd_help", questions=self.session.qns_display)
+        print(self._help_text)
     
     def cmd_time(self):
         """Display remaining exam time."""
-        remaining_time = self.session.format_remaining_time()
-        elapsed_minutes = (datetime.now() - self.session.exam_start_time).total_seconds() / 60
+        # One clock reading for everything shown
+        now = time.time()
+        remaining_time = self.session.format_remaining_time(now)
+        elapsed_minutes = (now - self.session.exam_start_time.timestamp()) / 60
         elapsed_formatted = f"{elapsed_minutes:.1f}"
         
-        print()
-        print(self._msg("cmd_time_heading", remaining=remaining_time))
+        out = ["", self._msg("cmd_time_heading", remaining=remaining_time)]
         if self.config.exam_time_minutes == -1:
-            print(self._msg("cmd_time_elapsed", elapsed=elapsed_formatted))
+            out.append(self._msg("cmd_time_elapsed", elapsed=elapsed_formatted))
         else:
             total_minutes = self.config.exam_time_minutes
-            print(self._msg("cmd_time_elapsed_total", elapsed=elapsed_formatted, total=total_minutes))
+            out.append(self._msg("cmd_time_elapsed_total", elapsed=elapsed_formatted, total=total_minutes))
         
         if self.session.exam_end_time is not None:
-            remaining_minutes = self.session.get_remaining_time().total_seconds() / 60
+            remaining_minutes = self.session.get_remaining_time(now).total_seconds() / 60
             if remaining_minutes <= 30:
-                print(self._msg("cmd_time_warning", minutes=30))
+                out.append(self._msg("cmd_time_warning", minutes=30))
         
-        print()
+        out.append("")
+        print("\n".join(out))
     
     def cmd_show_question(self, qn: str):
         """Display the prompt for a question."""
-        valid_questions = [f'q{i+1}' for i in range(self.session.config.total_questions)]
-        if qn not in valid_questions:
-            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=', '.join(valid_questions)))
+        if qn not in self.session.qn_set:
+            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=self.session.qns_display))
             return
         
         task = self.session.assigned_tasks.get(qn)
@@ -1042,169 +1602,114 @@ class ExamRunner:
             print(self._msg("cmd_question_not_assigned", qn=qn))
             return
         
-        if task in self.bank.easy:
-            difficulty = self._msg("difficulty_easy")
-        elif task in self.bank.medium:
-            difficulty = self._msg("difficulty_medium")
-        else:
-            difficulty = self._msg("difficulty_hard")
-        
-        print()
-        print(self._msg("cmd_show_heading", number=qn[1:], difficulty=difficulty, title=task.title))
-        print(self._msg("cmd_show_id", task_id=task.id))
-        print()
-        print(self._msg("cmd_show_prompt_label"))
-        print(task.prompt)
-        print()
-        print(self._msg("cmd_show_io_mode", mode=task.io.mode))
+        level = self.bank.difficulty_by_id.get(task.id, "hard")
+        difficulty = self._msg(f"difficulty_{level}")
+        
+        # Collected and printed at once rather than line by line
+        out = [
+            "",
+            self._msg("cmd_show_heading", number=qn[1:], difficulty=difficulty, title=task.title),
+            self._msg("cmd_show_id", task_id=task.id),
+            "",
+            self._msg("cmd_show_prompt_label"),
+            task.prompt,
+            "",
+            self._msg("cmd_show_io_mode", mode=task.io.mode),
+        ]
         
         if task.visible_sample:
-            print()
-            print(self._msg("cmd_show_sample_label"))
+            out.append("")
+            out.append(self._msg("cmd_show_sample_label"))
             if task.visible_sample.input:
-                print(self._msg("cmd_show_sample_input"))
-                print(task.visible_sample.input)
-                print(self._msg("cmd_show_sample_output"))
-                print(task.visible_sample.output)
+                out.append(self._msg("cmd_show_sample_input"))
+                out.append(str(task.visible_sample.input))
+                out.append(self._msg("cmd_show_sample_output"))
+                out.append(str(task.visible_sample.output))
             elif task.visible_sample.args is not None:
-                print(self._msg("cmd_show_sample_args"))
-                is_sudoku = self._is_sudoku_question(task)
-                if is_sudoku and task.visible_sample.args:
-                    self._print_sudoku_board(task.visible_sample.args[0])
+                out.append(self._msg("cmd_show_sample_args"))
+                if task.is_sudoku and task.visible_sample.args:
+                    out.append(self._format_sudoku_board(task.visible_sample.args[0]))
                 else:
-                    print(task.visible_sample.args)
+                    out.append(str(task.visible_sample.args))
                 if task.visible_sample.ret is not None:
-                    print(self._msg("cmd_show_sample_ret", value=task.visible_sample.ret))
+                    out.append(self._msg("cmd_show_sample_ret", value=task.visible_sample.ret))
         
-        code_file = Path(f"{qn}.py")
-        if not code_file.exists():
+        out.append("")
+        if not os.path.exists(self.session.code_files[qn]):
             self._create_code_file(qn, task)
-            print()
-            print(self._msg("cmd_show_question_1", qn=qn))
+            out.append(self._msg("cmd_show_question_1", qn=qn))
         else:
-            print()
-            print(self._msg("cmd_show_question_2", qn=qn))
-        
-        print()
-
-    def _is_sudoku_question(self, task) -> bool:
-        """Check if a task is about Sudoku based on its content."""
-        sudoku_keywords = ["sudoku", "9x9 matrix", "9x9 matrix"]
-        
-        title_lower = task.title.lower()
-        prompt_lower = task.prompt.lower()
-        
-        for keyword in sudoku_keywords:
-            if keyword in title_lower or keyword in prompt_lower:
-                return True
-        
-        # Additional check: if args looks like a 9x9 grid
-        if task.visible_sample and task.visible_sample.args:
-            args = task.visible_sample.args
-            if (len(args) == 1 and 
-                isinstance(args[0], list) and 
-                len(args[0]) == 9 and 
-                all(isinstance(row, list) and len(row) == 9 for row in args[0])):
-                return True
-        
-        return False
-    
-    def _print_sudoku_board(self, board: list[list[str]]) -> None:
-        """Print a Sudoku board in a nicely formatted way."""
-        print("┌───────┬───────┬───────┐")
-        for i in range(9):
-            if i % 3 == 0 and i != 0:
-                print("├───────┼───────┼───────┤")
-            
-            row_str = "│"
-            for j in range(9):
-                if j % 3 == 0 and j != 0:
-                    row_str += " │"
-                cell = board[i][j] if board[i][j] != "." else " "
-                row_str += f" {cell}"
-            
-            row_str += " │"
-            print(row_str)
-        
-        print("└───────┴───────┴───────┘")
+            out.append(self._msg("cmd_show_question_2", qn=qn))
+        out.append("")
+        
+        print("\n".join(out))
+
+    def _format_sudoku_board(self, board: list[list[str]]) -> str:
+        """Format a Sudoku board in a nicely formatted way."""
+        lines = [_SUDOKU_TOP]
+        for i, row in enumerate(board[:9]):
+            if i == 3 or i == 6:
+                lines.append(_SUDOKU_MID)
+            lines.append(_SUDOKU_ROW.format(*(cell if cell != "." else " " for cell in row)))
+        lines.append(_SUDOKU_BOTTOM)
+        return "\n".join(lines)
     
     def _create_code_file(self, qn: str, task: Task):
         """Create a starter code file for a question with prompt and sample."""
-        code_lines = []
-        
-        # Add header with question info
-        code_lines.append(f"# {task.title} ({task.id})")
-        code_lines.append("#" + "="*70)
-        code_lines.append("")
-        
-        # Add prompt as comments
-        code_lines.append(f"# {self._msg('codefile_prompt_label')}")
-        for line in task.prompt.split('\n'):
-            code_lines.append(f"# {line}")
-        code_lines.append("")
+        msg = self._msg
+        rule = "#" + "="*70
+        
+        # Every section is a run of newline-terminated lines
+        prompt = "".join(f"# {line}\n" for line in task.prompt.split('\n'))
+        sections = [
+            f"# {task.title} ({task.id})\n{rule}\n\n",
+            f"# {msg('codefile_prompt_label')}\n{prompt}\n",
+        ]
         
         # Add sample if available
-        if task.visible_sample:
-            code_lines.append(f"# {self._msg('codefile_sample_label')}")
-            if task.visible_sample.input:
-                code_lines.append(f"# {self._msg('codefile_input_label')} {repr(task.visible_sample.input.rstrip())}")
-                code_lines.append(f"# {self._msg('codefile_output_label')} {repr(task.visible_sample.output.rstrip())}")
-            elif task.visible_sample.args is not None:
-                code_lines.append(f"# {self._msg('codefile_args_label')} {task.visible_sample.args}")
-                code_lines.append(f"# {self._msg('codefile_expected_return_label')} {task.visible_sample.ret}")
-            code_lines.append("")
-        
-        code_lines.append("#" + "="*70)
-        code_lines.append("")
+        sample = task.visible_sample
+        if sample:
+            sections.append(f"# {msg('codefile_sample_label')}\n")
+            if sample.input:
+                sections.append(
+                    f"# {msg('codefile_input_label')} {repr(sample.input.rstrip())}\n"
+                    f"# {msg('codefile_output_label')} {repr(sample.output.rstrip())}\n"
+                )
+            elif sample.args is not None:
+                sections.append(
+                    f"# {msg('codefile_args_label')} {sample.args}\n"
+                    f"# {msg('codefile_expected_return_label')} {sample.ret}\n"
+                )
+            sections.append("\n")
+        
+        sections.append(f"{rule}\n\n")
         
         # Add mode-specific template
         if task.io.mode == "stdin_stdout":
-            code_lines.append(f"# {self._msg('codefile_stdin_header')}")
-            code_lines.append(f"# {self._msg('codefile_stdin_hint')}")
-            code_lines.append("")
-            code_lines.append(f"# {self._msg('codefile_code_here')}")
-            code_lines.append("")
+            sections.append(
+                f"# {msg('codefile_stdin_header')}\n"
+                f"# {msg('codefile_stdin_hint')}\n\n"
+                f"# {msg('codefile_code_here')}\n\n"
+            )
         
         elif task.io.mode == "function":
-            code_lines.append(f"# {self._msg('codefile_fn_important')}")
-            code_lines.append("")
-            
-            # Extract function signature from prompt if available
-            signature = self._extract_function_signature(task)
-            if signature:
-                code_lines.append(signature)
-            else:
-                # Fallback to basic template
-                code_lines.append(f"def {task.io.entrypoint}():")
-            
-            code_lines.append(f"    # {self._msg('codefile_code_here')}")
-            code_lines.append("    pass")
-            code_lines.append("")
-        
-        with open(f"{qn}.py", 'w', encoding='utf-8') as f:
-            f.write("\n".join(code_lines))
-    
-    def _extract_function_signature(self, task: Task) -> Optional[str]:
-        """
-        Extract function signature from task prompt.
+            # Function signature from the prompt if available, falling back
+            # to a basic template
+            signature = task.signature or f"def {task.io.entrypoint}():"
+            sections.append(
+                f"# {msg('codefile_fn_important')}\n\n"
+                f"{signature}\n"
+                f"    # {msg('codefile_code_here')}\n"
+                "    pass\n\n"
+            )
         
-        Looks for lines like:
-          def function_name(args) -> return_type:
-        """
-        lines = task.prompt.split('\n')
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith('def ') and task.io.entrypoint in stripped:
-                # Found the signature
-                return stripped
-        return None
+        # The file has no newline after its last line
+        Path(self.session.code_files[qn]).write_text("".join(sections)[:-1], encoding='utf-8')
     
     def cmd_test(self, qn: str):
         """Run tests for a question."""
-        valid_questions = [f'q{i+1}' for i in range(self.session.config.total_questions)]
-        question_list = ', '.join(valid_questions)
-        if qn not in valid_questions:
-            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=question_list))
+        if qn not in self.session.qn_set:
+            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=self.session.qns_display))
             return
         
         task = self.session.assigned_tasks.get(qn)
@@ -1212,8 +1717,8 @@ class ExamRunner:
             print(self._msg("cmd_question_not_assigned", qn=qn))
             return
         
-        code_file = Path(f"{qn}.py")
-        if not code_file.exists():
+        code_st = self._stat_code_file(qn)
+        if code_st is None:
             print(self._msg("cmd_question_missing_file", qn=qn))
             return
         
@@ -1221,7 +1726,7 @@ class ExamRunner:
         print(self._msg("cmd_test_running", count=len(task.tests), qn=qn))
         print()
         
-        results = self.session.grader.grade_submission(task, str(code_file))
+        results = self._grade(qn, task, code_st, use_cache=False)
         if results['passed'] < results['total']:
             self.session.failed_attempts[qn] = self.session.failed_attempts.get(qn, 0) + 1
         
@@ -1233,10 +1738,8 @@ class ExamRunner:
         print()
     def cmd_debug(self, qn: str):
         """Run tests with detailed error output for debugging."""
-        valid_questions = [f'q{i+1}' for i in range(self.session.config.total_questions)]
-        question_list = ', '.join(valid_questions)
-        if qn not in valid_questions:
-            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=question_list))
+        if qn not in self.session.qn_set:
+            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=self.session.qns_display))
             return
         
         task = self.session.assigned_tasks.get(qn)
@@ -1244,8 +1747,8 @@ class ExamRunner:
             print(self._msg("cmd_question_not_assigned", qn=qn))
             return
         
-        code_file = Path(f"{qn}.py")
-        if not code_file.exists():
+        code_st = self._stat_code_file(qn)
+        if code_st is None:
             print(self._msg("cmd_question_missing_file", qn=qn))
             return
         
@@ -1253,7 +1756,7 @@ class ExamRunner:
         print(self._msg("cmd_debug_running", count=len(task.tests), qn=qn))
         print()
         
-        results = self.session.grader.grade_submission(task, str(code_file))
+        results = self._grade(qn, task, code_st, use_cache=False)
         if results['passed'] < results['total']:
             self.session.failed_attempts[qn] = self.session.failed_attempts.get(qn, 0) + 1
         
@@ -1262,12 +1765,19 @@ class ExamRunner:
         
         self.session.log("DEBUG_TEST", f"Question: {qn}, Passed: {results['passed']}/{results['total']}")
         print()
+    def _print_hints_locked(self, qn: str):
+        """Explain that qN's hints unlock after more failed attempts."""
+        print()
+        print(self._msg("cmd_hint_attempts_blocked", qn=qn))
+        print(self._msg("cmd_hint_attempts_need", attempts=3))
+        print(self._msg("cmd_hint_attempts_current", current=self.session.failed_attempts.get(qn, 0)))
+        print(self._msg("cmd_hint_keep_trying"))
+        print()
+
     def cmd_hint(self, qn: str):
         """Display hints for a question based on progress."""
-        valid_questions = [f'q{i+1}' for i in range(self.session.config.total_questions)]
-        question_list = ', '.join(valid_questions)
-        if qn not in valid_questions:
-            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=question_list))
+        if qn not in self.session.qn_set:
+            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=self.session.qns_display))
             return
 
         task = self.session.assigned_tasks.get(qn)
@@ -1281,15 +1791,24 @@ class ExamRunner:
             print()
             return
 
-        code_file = Path(f"{qn}.py")
-        if not code_file.exists():
+        code_st = self._stat_code_file(qn)
+        if code_st is None:
             print()
             print(self._msg("cmd_hint_need_tests", qn=qn))
             print(self._msg("cmd_hint_need_tests_help"))
             print()
             return
 
-        results = self.session.grader.grade_submission(task, str(code_file))
+        # Hints stay locked while nothing passes and fewer than 3 failed
+        # test runs were made; if that was the state at the last grading and
+        # the file hasn't been saved since, say so without re-running it
+        last_mtime, last_pass_rate = self.session.last_pass_rate.get(qn, (None, None))
+        if (last_pass_rate == 0 and last_mtime == code_st.st_mtime_ns
+                and self.session.failed_attempts.get(qn, 0) < 3):
+            self._print_hints_locked(qn)
+            return
+
+        results = self._grade(qn, task, code_st)
         passed = results['passed']
         total = results['total']
         pass_rate = passed / total if total > 0 else 0.0
@@ -1308,12 +1827,7 @@ class ExamRunner:
         else:
             attempts = self.session.failed_attempts.get(qn, 0)
             if attempts < 3:
-                print()
-                print(self._msg("cmd_hint_attempts_blocked", qn=qn))
-                print(self._msg("cmd_hint_attempts_need", attempts=3))
-                print(self._msg("cmd_hint_attempts_current", current=attempts))
-                print(self._msg("cmd_hint_keep_trying"))
-                print()
+                self._print_hints_locked(qn)
                 return
             max_hints = min(len(task.hints), attempts - 2)
 
@@ -1344,10 +1858,8 @@ class ExamRunner:
         self.session.log("HINT_REQUEST", f"Question: {qn}, Progress: {passed}/{total}, Hints shown: {max_hints}")
     def cmd_submit(self, qn: str):
         """Submit code for a question."""
-        valid_questions = [f'q{i+1}' for i in range(self.session.config.total_questions)]
-        question_list = ', '.join(valid_questions)
-        if qn not in valid_questions:
-            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=question_list))
+        if qn not in self.session.qn_set:
+            print(self._msg("cmd_question_invalid", qn=qn, valid_questions=self.session.qns_display))
             return
         
         task = self.session.assigned_tasks.get(qn)
@@ -1355,23 +1867,22 @@ class ExamRunner:
             print(self._msg("cmd_question_not_assigned", qn=qn))
             return
         
-        code_file = Path(f"{qn}.py")
-        if not code_file.exists():
+        code_st = self._stat_code_file(qn)
+        if code_st is None:
             print(self._msg("cmd_question_missing_file", qn=qn))
             return
         
         print()
         print(self._msg("cmd_submit_start", qn=qn))
         
-        results = self.session.grader.grade_submission(task, str(code_file))
-        
-        with open(code_file, 'rb') as f:
-            code_bytes = f.read()
-        code_sha256 = hashlib.sha256(code_bytes).hexdigest()
+        # Hash the file as it is now, not as of its last stat-keyed digest,
+        # and re-grade whenever that differs from the graded content
+        code_sha256 = self.session.code_sha256(self.session.code_files[qn], code_st, refresh=True)
+        results = self._grade(qn, task, code_st, code_sha256=code_sha256)
         max_score = results.get("max_score", 0.0)
         
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.session.submissions[qn] = {
+        self.session.record_submission(qn, {
             "task_id": task.id,
             "score": results["score"],
             "passed": results["passed"],
@@ -1380,23 +1891,23 @@ class ExamRunner:
             "results": results["results"],
             "code_sha256": code_sha256,
             "timestamp": timestamp
-        }
+        })
         
-        print(self._msg("cmd_submit_result", passed=results['passed'], total=results['total'], score=results['score'], max_score=max_score))
-        print(self._msg("cmd_submit_saved"))
-        print(self._msg("cmd_submit_reminder"))
+        print("\n".join((
+            self._msg("cmd_submit_result", passed=results['passed'], total=results['total'], score=results['score'], max_score=max_score),
+            self._msg("cmd_submit_saved"),
+            self._msg("cmd_submit_reminder"),
+            "",
+        )))
         
         self.session.save_timer_state()
         self.session.log("SUBMISSION", f"Question: {qn}, Score: {results['score']:.2f}, Code SHA256: {code_sha256}")
-        print()
 
     def cmd_status(self):
         """Display submission status."""
-        print()
-        print(self._msg("cmd_status_header", student=self.session.student_name))
+        out = ["", self._msg("cmd_status_header", student=self.session.student_name)]
         
-        for i in range(self.session.config.total_questions):
-            qn = f"q{i+1}"
+        for qn in self.session.qns:
             task = self.session.assigned_tasks.get(qn)
             sub = self.session.submissions.get(qn)
             
@@ -1407,11 +1918,12 @@ class ExamRunner:
                     status_str += self._msg("cmd_status_submitted", score=sub['score'], max_score=max_score, passed=sub['passed'], total=sub['total'])
                 else:
                     status_str += self._msg("cmd_status_missing")
-                print(status_str)
+                out.append(status_str)
         
-        print()
-        print(self._msg("cmd_status_total", total_score=self.session.get_total_score(), max_score=self.session.get_max_score()))
-        print()
+        out.append("")
+        out.append(self._msg("cmd_status_total", total_score=self.session.get_total_score(), max_score=self.session.get_max_score()))
+        out.append("")
+        print("\n".join(out))
 
     def cmd_exit(self):
         """Exit the current exam session without finishing."""
@@ -1423,7 +1935,7 @@ class ExamRunner:
 
     def cmd_finish(self):
         """Finalize the exam and create submission package."""
-        submitted_count = sum(1 for sub in self.session.submissions.values() if sub is not None)
+        submitted_count = self.session.get_submitted_count()
 
         print()
         print(self._msg("cmd_finish_summary", submitted_count=submitted_count, questions=self.session.config.total_questions))
@@ -1441,6 +1953,8 @@ class ExamRunner:
         print()
         print(self._msg("cmd_finish_processing"))
 
+        self._flush_network_log()
+        self.session.flush_log()
         self.session.generate_results_file()
         zip_path = self.session.create_submission_zip()
 
@@ -5,13 +5,16 @@ Provides the Grader class which orchestrates test execution using the sandbox
 and applies various checker functions to validate outputs.
 """
 
+import ast
 import math
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Callable, Any
 
 from .models import Task, ExamConfig
-from .sandbox import run_code_stdin_stdout, run_code_function
+from .sandbox import run_code_stdin_stdout, run_code_function, SandboxWorker
 from .translations import TRANSLATIONS
 
 
@@ -26,6 +29,15 @@ class Grader:
             "float_isclose": self._float_isclose,
             "unordered_list_equal": self._unordered_list_equal,
         }
+        # Same checkers with the expected-side work done once per test case,
+        # see _make_checkers()
+        self._checker_factories: Dict[str, Callable[[Any], Callable[[Any], bool]]] = {
+            "exact_match": self._exact_match_for,
+            "float_isclose": self._float_isclose_for,
+            "unordered_list_equal": self._unordered_list_equal_for,
+        }
+        # task.id -> per-test checkers; tasks don't change during a session
+        self._task_checkers: Dict[str, List[Callable[[Any], bool]]] = {}
         self._message_fn = None
     
     # ===== HELPER FUNCTIONS =====
@@ -52,9 +64,7 @@ class Grader:
         Returns:
             True if outputs match exactly (after rstrip)
         """
-        student_str = str(student_output).rstrip()
-        expected_str = str(expected_output).rstrip()
-        return student_str == expected_str
+        return self._exact_match_for(expected_output)(student_output)
     
     def _float_isclose(self, student_output: Any, expected_output: Any) -> bool:
         """
@@ -70,12 +80,7 @@ class Grader:
         Returns:
             True if floats are close within tolerance
         """
-        try:
-            student_float = float(student_output)
-            expected_float = float(expected_output)
-            return math.isclose(student_float, expected_float, rel_tol=1e-6, abs_tol=1e-8)
-        except (ValueError, TypeError):
-            return False
+        return self._float_isclose_for(expected_output)(student_output)
     
     def _unordered_list_equal(self, student_output: Any, expected_output: Any) -> bool:
         """
@@ -91,29 +96,100 @@ class Grader:
         Returns:
             True if sorted lists are equal
         """
+        return self._unordered_list_equal_for(expected_output)(student_output)
+    
+    def _exact_match_for(self, expected_output: Any) -> Callable[[Any], bool]:
+        """Build an exact_match checker with the expected output stripped once."""
+        expected_str = str(expected_output).rstrip()
+        
+        def check(student_output: Any) -> bool:
+            return str(student_output).rstrip() == expected_str
+        return check
+    
+    def _float_isclose_for(self, expected_output: Any) -> Callable[[Any], bool]:
+        """Build a float_isclose checker with the expected output converted once."""
+        try:
+            expected_float = float(expected_output)
+        except (ValueError, TypeError):
+            expected_float = None
+        
+        def check(student_output: Any) -> bool:
+            try:
+                student_float = float(student_output)
+            except (ValueError, TypeError):
+                return False
+            if expected_float is None:
+                return False
+            return math.isclose(student_float, expected_float, rel_tol=1e-6, abs_tol=1e-8)
+        return check
+    
+    def _unordered_list_equal_for(self, expected_output: Any) -> Callable[[Any], bool]:
+        """Build an unordered_list_equal checker with the expected values sorted once."""
         try:
-            student_list = sorted(str(student_output).strip().split())
             expected_list = sorted(str(expected_output).strip().split())
-            return student_list == expected_list
         except Exception:
-            return False
+            expected_list = None
+        
+        def check(student_output: Any) -> bool:
+            if expected_list is None:
+                return False
+            try:
+                return sorted(str(student_output).strip().split()) == expected_list
+            except Exception:
+                return False
+        return check
+    
+    def _make_checkers(self, checker_name: str, expected_outputs: List[Any]) -> List[Callable[[Any], bool]]:
+        """
+        Build one single-argument checker per test case.
+        
+        Checkers registered only in self.checkers are wrapped as they are;
+        unknown names fall back to exact_match.
+        """
+        make_checker = self._checker_factories.get(checker_name)
+        if make_checker is None:
+            checker_func = self.checkers.get(checker_name, self._exact_match)
+            return [lambda output, expected=expected: checker_func(output, expected)
+                    for expected in expected_outputs]
+        return [make_checker(expected) for expected in expected_outputs]
+    
+    def _checkers_for(self, task: Task) -> List[Callable[[Any], bool]]:
+        """Return the per-test checkers of a task, built on its first grading."""
+        checkers = self._task_checkers.get(task.id)
+        if checkers is None:
+            if task.io.mode == "function":
+                expected_outputs = [test_case.ret for test_case in task.tests]
+            else:
+                expected_outputs = [test_case.output for test_case in task.tests]
+            checkers = self._make_checkers(task.checker or "exact_match", expected_outputs)
+            self._task_checkers[task.id] = checkers
+        return checkers
     
     # ===== TEST EXECUTION =====
     
+    @staticmethod
+    def _has_no_code(code_path: str) -> bool:
+        """
+        Check if a file holds no statements (empty, whitespace or comments only).
+        
+        Files that fail to parse count as code; the sandbox reports their errors.
+        That includes deeply nested code the parser gives up on with
+        MemoryError or RecursionError, which mustn't abort grading here.
+        """
+        try:
+            return not ast.parse(Path(code_path).read_bytes()).body
+        except (SyntaxError, ValueError, OSError, MemoryError, RecursionError):
+            return False
+    
     def get_task_difficulty(self, task: Task, bank) -> str:
         """Determine the difficulty level of a task."""
-        if task in bank.easy:
-            return "easy"
-        elif task in bank.medium:
-            return "medium"
-        elif task in bank.hard:
-            return "hard"
-        return "unknown"
+        return bank.difficulty_by_id.get(task.id, "unknown")
     
     def grade_submission(
         self,
         task: Task,
-        code_path: str
+        code_path: str,
+        parallel_tests: bool = True
     ) -> Dict[str, Any]:
         """
         Run all test cases for a task and return results.
@@ -121,6 +197,10 @@ class Grader:
         Args:
             task: Task object containing test cases and configuration
             code_path: Path to the student's Python file
+            parallel_tests: Allow the tests to run side by side when
+                config.parallel_grading is set. Callers that already grade
+                several submissions at once pass False to keep the total
+                number of sandbox processes bounded.
         
         Returns:
             Dictionary containing:
@@ -144,16 +224,20 @@ class Grader:
         timeout_sec = task.time_limit_ms / 1000.0
         memory_limit_mb = task.memory_limit_mb
         
-        checker_name = task.checker or "exact_match"
-        checker_func = self.checkers.get(checker_name, self._exact_match)
+        checkers = self._checkers_for(task)
+        
+        # A file without code gives the same result for every test; work it
+        # out here instead of starting a sandbox process per test
+        no_code = self._has_no_code(code_path)
+        workers = self._grading_workers(len(task.tests)) if parallel_tests else 1
         
         if task.io.mode == "stdin_stdout":
             passed_count, results = self._grade_stdin_stdout(
-                task, code_path, timeout_sec, memory_limit_mb, checker_func
+                task, code_path, timeout_sec, memory_limit_mb, checkers, no_code, workers
             )
         elif task.io.mode == "function":
             passed_count, results = self._grade_function(
-                task, code_path, timeout_sec, memory_limit_mb, checker_func
+                task, code_path, timeout_sec, memory_limit_mb, checkers, no_code, workers
             )
         else:
             results = [{"status": "error", "message": f"Unknown I/O mode: {task.io.mode}"}]
@@ -180,43 +264,81 @@ class Grader:
             "results": results
         }
     
+    def _grading_workers(self, test_count: int) -> int:
+        """Number of tests to run side by side, 1 unless config.parallel_grading is set."""
+        if not self.config.parallel_grading:
+            return 1
+        return min(test_count, os.cpu_count() or 1)
+    
+    @staticmethod
+    def _tally(outcomes: List[Tuple[bool, Dict[str, Any]]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Turn (is_correct, result_dict) pairs into (passed_count, results_list)."""
+        passed_count = sum(1 for is_correct, _ in outcomes if is_correct)
+        return passed_count, [result_dict for _, result_dict in outcomes]
+    
+    def _run_tests(self, task: Task, run_single_test: Callable, workers: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Run run_single_test over every test case of a task.
+        
+        Each test is an independent sandbox subprocess, so with workers > 1
+        the tests run on a thread pool of that size. executor.map keeps the
+        results in test order.
+        
+        Returns:
+            Tuple of (passed_count, results_list)
+        """
+        numbered_tests = list(enumerate(task.tests, start=1))
+        
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(lambda item: run_single_test(*item), numbered_tests))
+        else:
+            outcomes = [run_single_test(i, test_case) for i, test_case in numbered_tests]
+        
+        return self._tally(outcomes)
+    
     def _grade_stdin_stdout(
         self,
         task: Task,
         code_path: str,
         timeout_sec: float,
         memory_limit_mb: int,
-        checker_func: Callable
+        checkers: List[Callable[[Any], bool]],
+        no_code: bool = False,
+        workers: int = 1
     ) -> Tuple[int, List[Dict[str, Any]]]:
         """
         Grade a stdin/stdout mode task.
         
+        checkers holds one checker per test, see _checkers_for(). no_code
+        skips the sandbox for a file without statements. workers is how many
+        tests may run side by side.
+        
         Returns:
             Tuple of (passed_count, results_list)
         """
-        results = []
-        passed_count = 0
-        
-        for i, test_case in enumerate(task.tests, start=1):
-            start_time = time.time()
+        def run_single_test(i: int, test_case) -> Tuple[bool, Dict[str, Any]]:
+            start_ns = time.perf_counter_ns()
             
-            status, stdout, stderr = run_code_stdin_stdout(
-                code_path,
-                test_case.input or "",
-                timeout_sec,
-                memory_limit_mb
-            )
+            if no_code:
+                # An empty script prints nothing and exits cleanly
+                status, stdout, stderr = "success", "", ""
+            else:
+                status, stdout, stderr = run_code_stdin_stdout(
+                    code_path,
+                    test_case.input or "",
+                    timeout_sec,
+                    memory_limit_mb
+                )
             
-            elapsed_ms = int((time.time() - start_time) * 1000)
+            elapsed_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
 
             is_correct = False
             result_status = status
             
             if status == "success":
-                is_correct = checker_func(stdout, test_case.output)
+                is_correct = checkers[i - 1](stdout)
                 result_status = "passed" if is_correct else "failed"
-                if is_correct:
-                    passed_count += 1
             elif status == "timeout":
                 result_status = "timeout"
             elif status == "memory_error":
@@ -235,9 +357,9 @@ class Grader:
                 result_dict["student_output"] = stdout
                 result_dict["expected_output"] = test_case.output
             
-            results.append(result_dict)
+            return is_correct, result_dict
         
-        return passed_count, results
+        return self._run_tests(task, run_single_test, workers)
     
     def _grade_function(
         self,
@@ -245,38 +367,48 @@ class Grader:
         code_path: str,
         timeout_sec: float,
         memory_limit_mb: int,
-        checker_func: Callable
+        checkers: List[Callable[[Any], bool]],
+        no_code: bool = False,
+        workers: int = 1
     ) -> Tuple[int, List[Dict[str, Any]]]:
         """
         Grade a function mode task.
         
+        checkers holds one checker per test, see _checkers_for(). no_code
+        skips the sandbox for a file without statements. workers is how many
+        tests may run side by side.
+        
         Returns:
             Tuple of (passed_count, results_list)
         """
-        results = []
-        passed_count = 0
-        
-        for i, test_case in enumerate(task.tests, start=1):
-            start_time = time.time()
-            
-            status, return_value, error_msg = run_code_function(
-                code_path,
-                task.io.entrypoint,
-                test_case.args or [],
-                timeout_sec,
-                memory_limit_mb
-            )
+        def run_single_test(i: int, test_case) -> Tuple[bool, Dict[str, Any]]:
+            start_ns = time.perf_counter_ns()
             
-            elapsed_ms = int((time.time() - start_time) * 1000)
+            if no_code:
+                # An empty module imports fine but has no entrypoint to call
+                status, return_value, error_msg = (
+                    "runtime_error", None, f"Function '{task.io.entrypoint}' not found"
+                )
+            else:
+                status, return_value, error_msg = run_code_function(
+                    code_path,
+                    task.io.entrypoint,
+                    test_case.args or [],
+                    timeout_sec,
+                    memory_limit_mb
+                )
             
+            elapsed_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            return build_result(i, test_case, status, return_value, error_msg, elapsed_ms)
+        
+        def build_result(i: int, test_case, status: str, return_value: Any, error_msg: str,
+                         elapsed_ms: int) -> Tuple[bool, Dict[str, Any]]:
             is_correct = False
             result_status = status
             
             if status == "success":
-                is_correct = checker_func(return_value, test_case.ret)
+                is_correct = checkers[i - 1](return_value)
                 result_status = "passed" if is_correct else "failed"
-                if is_correct:
-                    passed_count += 1
             elif status == "timeout":
                 result_status = "timeout"
             elif status == "memory_error":
@@ -300,9 +432,23 @@ class Grader:
                 result_dict["student_output"] = return_value
                 result_dict["expected_output"] = test_case.ret
             
-            results.append(result_dict)
+            return is_correct, result_dict
+        
+        if SandboxWorker.supported and not no_code:
+            # Fork the tests from worker processes instead of starting
+            # Python for every test
+            with SandboxWorker(code_path, task.io.entrypoint, memory_limit_mb) as worker:
+                outputs = worker.call_batch(
+                    [test_case.args or [] for test_case in task.tests],
+                    timeout_sec,
+                    workers
+                )
+            return self._tally([
+                build_result(i, test_case, *output)
+                for i, (test_case, output) in enumerate(zip(task.tests, outputs), start=1)
+            ])
         
-        return passed_count, results
+        return self._run_tests(task, run_single_test, workers)
     
     # ===== UTILITY METHODS =====
     
@@ -4,9 +4,13 @@ Data models for the Question Bank schema.
 Provides type-safe structures for Task, TestCase, and Bank objects.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Optional, List, Dict, Any
 
+# Title/prompt phrases that mark a task as a Sudoku puzzle (matched lowercase)
+_SUDOKU_KEYWORDS = ("sudoku", "9x9 matrix")
+
 
 @dataclass
 class IOConfig:
@@ -50,6 +54,46 @@ class Task:
     hints: Optional[List[str]] = None
     tags: Optional[List[str]] = None
     visible_sample: Optional[VisibleSample] = None
+    # Derived from the fields above in __post_init__
+    is_sudoku: bool = field(init=False, compare=False, repr=False)
+    signature: Optional[str] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        self.is_sudoku = self._looks_like_sudoku()
+        self.signature = self._extract_function_signature()
+
+    def _extract_function_signature(self) -> Optional[str]:
+        """
+        Extract function signature from the prompt of a function-mode task.
+        
+        Looks for lines like:
+          def function_name(args) -> return_type:
+        """
+        if self.io.mode != "function" or not self.io.entrypoint:
+            return None
+        for line in self.prompt.splitlines():
+            stripped = line.strip()
+            if stripped.startswith('def ') and self.io.entrypoint in stripped:
+                # Found the signature
+                return stripped
+        return None
+
+    def _looks_like_sudoku(self) -> bool:
+        """Check if the task is about Sudoku based on its content."""
+        text = f"{self.title}\n{self.prompt}".lower()
+        if any(keyword in text for keyword in _SUDOKU_KEYWORDS):
+            return True
+        
+        # Additional check: if args looks like a 9x9 grid
+        if self.visible_sample and self.visible_sample.args:
+            args = self.visible_sample.args
+            if (len(args) == 1 and 
+                isinstance(args[0], list) and 
+                len(args[0]) == 9 and 
+                all(isinstance(row, list) and len(row) == 9 for row in args[0])):
+                return True
+        
+        return False
 
     @staticmethod
     def from_dict(data: dict) -> 'Task':
@@ -178,6 +222,24 @@ class Bank:
             tasks[task.id] = task
         return tasks
 
+    @cached_property
+    def tasks_by_id(self) -> Dict[str, Task]:
+        """
+        Read-only task ID lookup, built on first access and reused.
+
+        Use get_all_tasks() when a private, mutable copy is needed.
+        """
+        return self.get_all_tasks()
+
+    @cached_property
+    def difficulty_by_id(self) -> Dict[str, str]:
+        """Map task IDs to "easy", "medium" or "hard", built on first access."""
+        difficulties = {}
+        for difficulty, tasks in (("easy", self.easy), ("medium", self.medium), ("hard", self.hard)):
+            for task in tasks:
+                difficulties.setdefault(task.id, difficulty)
+        return difficulties
+
 
 @dataclass
 class ExamConfig:
@@ -193,6 +255,7 @@ class ExamConfig:
         medium_weight: Point value for each medium question
         hard_weight: Point value for each hard question
         max_points: Maximum total points for the exam
+        parallel_grading: Run a task's test cases concurrently when grading (off by default)
     """
     total_questions: int
     easy_count: int
@@ -204,6 +267,7 @@ class ExamConfig:
     max_points: float
     exam_time_minutes: int
     work_dir_postfix: str
+    parallel_grading: bool = False
     
     @staticmethod
     def from_dict(data: dict) -> 'ExamConfig':
@@ -218,7 +282,8 @@ class ExamConfig:
             hard_weight=float(data.get('hard_weight', 5.0)),
             max_points=float(data.get('max_points', 15.0)),
             exam_time_minutes=data.get('exam_time_minutes', 120),
-            work_dir_postfix=data.get('work_dir_postfix', 'TP_EVAL')
+            work_dir_postfix=data.get('work_dir_postfix', 'TP_EVAL'),
+            parallel_grading=bool(data.get('parallel_grading', False))
         )
     
     def validate(self) -> tuple[bool, str]:
@@ -271,7 +336,8 @@ class ExamConfig:
             hard_weight=5.0,
             max_points=15.0,
             exam_time_minutes=120,
-            work_dir_postfix='TP_EVAL'
+            work_dir_postfix='TP_EVAL',
+            parallel_grading=False
         )
 
 
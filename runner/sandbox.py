@@ -4,16 +4,24 @@ Secure sandbox for executing student code with resource limits.
 Provides cross-platform isolation using subprocess with interpreter flags.
 Unix: Uses resource module for CPU time and memory limits.
 Windows: Uses timeout parameter (wall-clock time only).
+
+SandboxWorker (Unix) forks function-mode tests from a long-lived process
+instead of starting a new interpreter for each one.
 """
 
+import os
 import sys
 import json
+import select
+import signal
 import subprocess
 import platform
 import tempfile
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 
 def get_python_executable():
@@ -33,6 +41,83 @@ def get_python_executable():
 PYTHON_EXE, ISOLATION_FLAGS = get_python_executable()
 
 
+# Runs one function-mode test; filled in with the student module and function name
+_FUNCTION_WRAPPER_TEMPLATE = """
+import sys
+import json
+import os
+
+# Add current directory to sys.path to enable imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Import student module
+try:
+    import {student_module_name} as student_module
+except Exception as e:
+    print(json.dumps({{"error": "import_error", "message": str(e)}}))
+    sys.exit(1)
+
+# Get the function
+try:
+    func = getattr(student_module, '{function_name}')
+except AttributeError:
+    print(json.dumps({{"error": "function_not_found", "message": "Function '{function_name}' not found"}}))
+    sys.exit(1)
+
+# Load arguments
+args = json.loads(sys.stdin.read())
+
+# Call the function
+try:
+    result = func(*args)
+    print(json.dumps({{"result": result}}))
+except Exception as e:
+    print(json.dumps({{"error": "runtime_error", "message": str(e)}}))
+    sys.exit(1)
+"""
+
+
+def _prepare_function_dir(temp_dir: str, code_path: str, function_name: str) -> Path:
+    """Copy the student's file into temp_dir next to a wrapper calling function_name."""
+    temp_code_path = Path(temp_dir) / Path(code_path).name
+    shutil.copy(code_path, temp_code_path)
+    
+    wrapper_path = Path(temp_dir) / "__wrapper__.py"
+    with open(wrapper_path, 'w', encoding='utf-8') as f:
+        f.write(_FUNCTION_WRAPPER_TEMPLATE.format(
+            student_module_name=Path(code_path).stem,
+            function_name=function_name
+        ))
+    return wrapper_path
+
+
+def _parse_function_output(stdout: str, stderr: str) -> Tuple[str, any, str]:
+    """Turn the wrapper's output into (status, return_value, error_message)."""
+    try:
+        result_data = json.loads(stdout)
+
+        if "error" in result_data:
+            error_type = result_data["error"]
+            error_msg = result_data.get("message", "Unknown error")
+
+            if error_type == "import_error":
+                return "import_error", None, error_msg
+            elif error_type == "function_not_found":
+                return "runtime_error", None, error_msg
+            else:
+                return "runtime_error", None, error_msg
+
+        if "result" in result_data:
+            return "success", result_data["result"], ""
+
+        return "runtime_error", None, "Invalid response format"
+
+    except json.JSONDecodeError:
+        if 'MemoryError' in stderr or 'memory' in stderr.lower():
+            return "memory_error", None, "Memory limit exceeded"
+        return "runtime_error", None, f"Failed to parse output: {stdout[:200]}"
+
+
 def run_code_stdin_stdout(
     code_path: str,
     input_str: str,
@@ -139,49 +224,8 @@ def run_code_function(
         Tuple of (status, return_value, error_message)
         status: "success", "timeout", "runtime_error", "memory_error", "import_error"
     """
-    student_module_name = Path(code_path).stem
-
-    wrapper_code = f"""
-import sys
-import json
-import os
-
-# Add current directory to sys.path to enable imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-# Import student module
-try:
-    import {student_module_name} as student_module
-except Exception as e:
-    print(json.dumps({{"error": "import_error", "message": str(e)}}))
-    sys.exit(1)
-
-# Get the function
-try:
-    func = getattr(student_module, '{function_name}')
-except AttributeError:
-    print(json.dumps({{"error": "function_not_found", "message": "Function '{function_name}' not found"}}))
-    sys.exit(1)
-
-# Load arguments
-args = json.loads(sys.stdin.read())
-
-# Call the function
-try:
-    result = func(*args)
-    print(json.dumps({{"result": result}}))
-except Exception as e:
-    print(json.dumps({{"error": "runtime_error", "message": str(e)}}))
-    sys.exit(1)
-"""
-    
     with tempfile.TemporaryDirectory() as temp_dir:
-        temp_code_path = Path(temp_dir) / Path(code_path).name
-        shutil.copy(code_path, temp_code_path)
-        
-        wrapper_path = Path(temp_dir) / "__wrapper__.py"
-        with open(wrapper_path, 'w', encoding='utf-8') as f:
-            f.write(wrapper_code)
+        wrapper_path = _prepare_function_dir(temp_dir, code_path, function_name)
         
         input_json = json.dumps(args)
         
@@ -226,30 +270,7 @@ except Exception as e:
             
             stdout = proc.stdout.decode('utf-8', errors='replace')
             stderr = proc.stderr.decode('utf-8', errors='replace')
-
-            try:
-                result_data = json.loads(stdout)
-                
-                if "error" in result_data:
-                    error_type = result_data["error"]
-                    error_msg = result_data.get("message", "Unknown error")
-                    
-                    if error_type == "import_error":
-                        return "import_error", None, error_msg
-                    elif error_type == "function_not_found":
-                        return "runtime_error", None, error_msg
-                    else:
-                        return "runtime_error", None, error_msg
-                
-                if "result" in result_data:
-                    return "success", result_data["result"], ""
-                
-                return "runtime_error", None, "Invalid response format"
-            
-            except json.JSONDecodeError:
-                if 'MemoryError' in stderr or 'memory' in stderr.lower():
-                    return "memory_error", None, "Memory limit exceeded"
-                return "runtime_error", None, f"Failed to parse output: {stdout[:200]}"
+            return _parse_function_output(stdout, stderr)
         
         except subprocess.TimeoutExpired:
             return "timeout", None, "Process exceeded time limit"
@@ -258,3 +279,258 @@ except Exception as e:
         except Exception as e:
             return "runtime_error", None, f"Execution error: {str(e)}"
 
+
+
+# Fork server behind SandboxWorker. Reads one JSON batch of tests per line
+# and runs them one after another, each in a forked child that runs the
+# function wrapper with the test's limits and args on stdin. Replies with
+# one JSON list holding every child's stdout, stderr and run time. The
+# server itself never runs student code, so each test still starts from a
+# fresh import of the student module, just without a new interpreter.
+_FORK_SERVER_CODE = r"""
+import json
+import os
+import runpy
+import select
+import signal
+import sys
+import time
+import traceback
+
+wrapper_path = sys.argv[1]
+io_prefix = os.path.join(os.path.dirname(wrapper_path), f".worker-{os.getpid()}")
+args_path, out_path, err_path = (io_prefix + ext for ext in (".in", ".out", ".err"))
+
+
+def run_child(timeout_sec, memory_limit_mb):
+    for fd, path, flags in ((0, args_path, os.O_RDONLY),
+                            (1, out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC),
+                            (2, err_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)):
+        os.dup2(os.open(path, flags, 0o600), fd)
+    sys.stdin = open(0, encoding="utf-8", closefd=False)
+    sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+    sys.stderr = open(2, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+
+    try:
+        import resource
+        try:
+            resource.setrlimit(resource.RLIMIT_CPU, (int(timeout_sec) + 1, int(timeout_sec) + 1))
+        except (ValueError, OSError):
+            pass
+        try:
+            memory_bytes = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+        except (ValueError, OSError):
+            pass
+    except ImportError:
+        pass
+
+    code = 0
+    try:
+        runpy.run_path(wrapper_path, run_name="__main__")
+    except SystemExit as e:
+        code = 0 if e.code is None else 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+
+def run_test(input_json, timeout_sec, memory_limit_mb):
+    with open(args_path, "w", encoding="utf-8") as f:
+        f.write(input_json)
+
+    # The child holds the write end until it exits, so EOF on exit_r marks
+    # its exit and select() can time it out without a signal handler
+    exit_r, exit_w = os.pipe()
+    start_ns = time.perf_counter_ns()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(exit_r)
+            run_child(timeout_sec, memory_limit_mb)
+        finally:
+            os._exit(1)
+    os.close(exit_w)
+
+    # Same fallback wall-clock limit as run_code_function()
+    exited = select.select([exit_r], [], [], timeout_sec * 2)[0]
+    os.close(exit_r)
+    if not exited:
+        os.kill(pid, signal.SIGKILL)
+    os.waitpid(pid, 0)
+    elapsed_ns = time.perf_counter_ns() - start_ns
+
+    if not exited:
+        return {"timeout": True, "elapsed_ns": elapsed_ns}
+    reply = {"timeout": False, "elapsed_ns": elapsed_ns}
+    for key, path in (("stdout", out_path), ("stderr", err_path)):
+        try:
+            with open(path, "rb") as f:
+                reply[key] = f.read().decode("utf-8", errors="replace")
+        except OSError:
+            reply[key] = ""
+    return reply
+
+
+# One request per test. The client only sends the next one after reading
+# this reply, so a forked test never holds another test's input.
+for line in iter(sys.stdin.buffer.readline, b""):
+    request = json.loads(line)
+    del line
+    reply = run_test(request["input"], request["timeout_sec"], request["memory_limit_mb"])
+    sys.stdout.buffer.write(json.dumps(reply).encode("utf-8") + b"\n")
+    sys.stdout.buffer.flush()
+"""
+
+
+class _ForkServer:
+    """One fork server process; runs one test at a time."""
+    
+    def __init__(self, temp_dir: str, wrapper_path: Path):
+        self.proc = subprocess.Popen(
+            [PYTHON_EXE, *ISOLATION_FLAGS, '-c', _FORK_SERVER_CODE, str(wrapper_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=temp_dir,
+            start_new_session=True  # lets kill() take the running test down too
+        )
+        self._pending = b""
+    
+    def run_test(self, input_json: str, timeout_sec: float, memory_limit_mb: int) -> Optional[dict]:
+        """
+        Run one test and return the server's reply.
+        
+        The server times the test out itself. Returns None if the server
+        overran even that. Raises OSError if the server died.
+        """
+        request = {"input": input_json, "timeout_sec": timeout_sec, "memory_limit_mb": memory_limit_mb}
+        self.proc.stdin.write(json.dumps(request).encode('utf-8') + b"\n")
+        self.proc.stdin.flush()
+        
+        deadline = time.monotonic() + timeout_sec * 2 + 1
+        fd = self.proc.stdout.fileno()  # read raw; proc.stdout's buffer is never used
+        while b"\n" not in self._pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise OSError("sandbox worker exited")
+            self._pending += chunk
+        
+        line, self._pending = self._pending.split(b"\n", 1)
+        return json.loads(line)
+    
+    def kill(self):
+        """Stop the server and any test it is running."""
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.proc.wait()
+        for pipe in (self.proc.stdin, self.proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class SandboxWorker:
+    """
+    Run function-mode tests for one submission without starting a new
+    interpreter per test.
+    
+    Tests are forked from long-lived worker processes, so each still gets
+    a fresh import of the student's module and its own CPU and memory
+    limits. A worker is only sent the test it runs next. If one dies or
+    hangs, its remaining tests run through run_code_function(). Use as a
+    context manager. Unix only, check SandboxWorker.supported and fall back
+    to run_code_function().
+    """
+    
+    supported = platform.system() != "Windows" and hasattr(os, "fork")
+    
+    def __init__(self, code_path: str, function_name: str, memory_limit_mb: int):
+        self.code_path = code_path
+        self.function_name = function_name
+        self.memory_limit_mb = memory_limit_mb
+        self._temp_dir: Optional[tempfile.TemporaryDirectory] = None
+        self._wrapper_path: Optional[Path] = None
+    
+    def __enter__(self) -> 'SandboxWorker':
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._wrapper_path = _prepare_function_dir(self._temp_dir.name, self.code_path, self.function_name)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+    
+    def call_batch(
+        self,
+        args_list: List[list],
+        timeout_sec: float,
+        max_workers: int = 1
+    ) -> List[Tuple[str, any, str, int]]:
+        """
+        Call the function once per entry of args_list.
+        
+        Each worker process runs one contiguous chunk of the list; with
+        max_workers > 1 the list is split into that many chunks run side
+        by side.
+        
+        Returns:
+            List of (status, return_value, error_message, elapsed_ms) in
+            args_list order, the first three as from run_code_function()
+        """
+        chunk_size = -(-len(args_list) // max(1, max_workers))
+        chunks = [args_list[i:i + chunk_size] for i in range(0, len(args_list), chunk_size)]
+        
+        if len(chunks) <= 1:
+            return self._run_chunk(args_list, timeout_sec) if args_list else []
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            results = executor.map(lambda chunk: self._run_chunk(chunk, timeout_sec), chunks)
+            return [result for chunk_results in results for result in chunk_results]
+    
+    def _run_chunk(self, args_list: List[list], timeout_sec: float) -> List[Tuple[str, any, str, int]]:
+        """Run one chunk of tests on its own worker process."""
+        results = []
+        server = None
+        try:
+            server = _ForkServer(self._temp_dir.name, self._wrapper_path)
+            for args in args_list:
+                reply = server.run_test(json.dumps(args), timeout_sec, self.memory_limit_mb)
+                if reply is None:
+                    break
+                results.append(self._result_from_reply(reply))
+        except Exception:
+            pass  # the server died; run what it didn't finish below
+        finally:
+            if server is not None:
+                server.kill()
+        
+        # Includes the test that was running, in case it took the server down
+        for args in args_list[len(results):]:
+            start_ns = time.perf_counter_ns()
+            status, return_value, error_msg = run_code_function(
+                self.code_path, self.function_name, args, timeout_sec, self.memory_limit_mb
+            )
+            results.append((status, return_value, error_msg, (time.perf_counter_ns() - start_ns) // 1_000_000))
+        return results
+    
+    @staticmethod
+    def _result_from_reply(reply: dict) -> Tuple[str, any, str, int]:
+        """Turn a fork server reply into call_batch()'s result tuple."""
+        elapsed_ms = reply["elapsed_ns"] // 1_000_000
+        if reply["timeout"]:
+            return "timeout", None, "Process exceeded time limit", elapsed_ms
+        try:
+            status, return_value, error_msg = _parse_function_output(reply["stdout"], reply["stderr"])
+        except Exception as e:
+            status, return_value, error_msg = "runtime_error", None, f"Execution error: {str(e)}"
+        return status, return_value, error_msg, elapsed_ms
@@ -44,6 +44,20 @@ a = Analysis(
         'cryptography.hazmat',
         'cryptography.hazmat.primitives',
         'cryptography.hazmat.backends',
+        # Optional; without it the runner falls back to the json module
+        'orjson',
+        # Optional; without it code files are polled with stat(). Observer
+        # picks its platform backend at runtime, so list those as well
+        'watchdog',
+        'watchdog.events',
+        'watchdog.observers',
+        'watchdog.observers.api',
+        'watchdog.observers.inotify',
+        'watchdog.observers.inotify_buffer',
+        'watchdog.observers.fsevents',
+        'watchdog.observers.read_directory_changes',
+        'watchdog.observers.winapi',
+        'watchdog.observers.polling',
     ],
     hookspath=[],
     hooksconfig={},
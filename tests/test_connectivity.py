@@ -10,6 +10,9 @@ Tests the internet connectivity checking functionality including:
 
 import pytest
 import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, Mock, MagicMock
 from pathlib import Path
 
@@ -17,7 +20,51 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from runner.connectivity import check_internet_connectivity
+from runner.connectivity import (
+    check_internet_connectivity, NetworkChangeWatcher, DNS_PROBE_TARGETS
+)
+
+
+def _respond(successes=(), error=OSError("Connection failed")):
+    """
+    Build a create_connection side effect keyed on the host.
+
+    Probes run concurrently, so responses can't be given as an ordered list.
+    """
+    def side_effect(address, timeout=None):
+        if address[0] in successes:
+            return Mock()
+        raise error
+    return side_effect
+
+
+class _JoinedExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose shutdown() always waits for its threads."""
+    
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        super().shutdown(wait=True, cancel_futures=cancel_futures)
+
+
+@pytest.fixture(autouse=True)
+def _join_probes():
+    """
+    Make check_internet_connectivity() wait for all of its probes.
+
+    It normally returns on the first success and leaves the slower probes
+    running, which would then call the next test's patched create_connection.
+    """
+    with patch('runner.connectivity.ThreadPoolExecutor', _JoinedExecutor):
+        yield
+
+
+def _probed(mock_connection):
+    """Return the set of (address, timeout) pairs create_connection was called with."""
+    return {(c.args[0], c.kwargs.get('timeout')) for c in mock_connection.call_args_list}
+
+
+def _all_targets(timeout=2.0):
+    """The (address, timeout) pairs of a full probe round."""
+    return {(address, timeout) for address in DNS_PROBE_TARGETS}
 
 
 class TestConnectivitySuccess:
@@ -31,7 +78,44 @@ class TestConnectivitySuccess:
         result = check_internet_connectivity()
         
         assert result is True
-        mock_connection.assert_called_once_with(("1.1.1.1", 53), timeout=2.0)
+        assert _probed(mock_connection) == _all_targets(2.0)
+    
+    @patch('socket.create_connection')
+    def test_returns_on_first_success(self, mock_connection):
+        """Test that the first successful probe returns without waiting for the rest."""
+        release = threading.Event()
+        
+        def side_effect(address, timeout=None):
+            if address[0] == "8.8.8.8":
+                return Mock()
+            release.wait(5.0)
+            raise OSError("Connection failed")
+        
+        mock_connection.side_effect = side_effect
+        
+        pools = []
+        
+        class RecordedExecutor(ThreadPoolExecutor):
+            """The real, non-waiting pool, kept so the test can join it."""
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                pools.append(self)
+        
+        with patch('runner.connectivity.ThreadPoolExecutor', RecordedExecutor):
+            try:
+                start_time = time.time()
+                result = check_internet_connectivity()
+                elapsed_time = time.time() - start_time
+                
+                assert result is True
+                # The other probes are still blocked at this point
+                assert not release.is_set()
+                assert elapsed_time < 1.0
+            finally:
+                release.set()
+                for pool in pools:
+                    pool.shutdown(wait=True)
+            assert _probed(mock_connection) == _all_targets(2.0)
     
     @patch('socket.create_connection')
     def test_check_connectivity_with_custom_timeout(self, mock_connection):
@@ -41,7 +125,7 @@ class TestConnectivitySuccess:
         result = check_internet_connectivity(timeout=5.0)
         
         assert result is True
-        mock_connection.assert_called_once_with(("1.1.1.1", 53), timeout=5.0)
+        assert _probed(mock_connection) == _all_targets(5.0)
     
     @patch('socket.create_connection')
     def test_check_connectivity_very_short_timeout(self, mock_connection):
@@ -51,7 +135,7 @@ class TestConnectivitySuccess:
         result = check_internet_connectivity(timeout=0.5)
         
         assert result is True
-        mock_connection.assert_called_once_with(("1.1.1.1", 53), timeout=0.5)
+        assert _probed(mock_connection) == _all_targets(0.5)
 
 
 class TestConnectivityFallback:
@@ -60,65 +144,32 @@ class TestConnectivityFallback:
     @patch('socket.create_connection')
     def test_fallback_to_google_dns(self, mock_connection):
         """Test fallback to Google DNS when Cloudflare fails."""
-        # First call (Cloudflare) fails, second call (Google) succeeds
-        mock_connection.side_effect = [
-            OSError("Connection failed"),
-            Mock()  # Success
-        ]
+        mock_connection.side_effect = _respond({"8.8.8.8"})
         
         result = check_internet_connectivity()
         
         assert result is True
-        assert mock_connection.call_count == 2
-        
-        # Verify calls
-        calls = mock_connection.call_args_list
-        assert calls[0][0] == (("1.1.1.1", 53),)
-        assert calls[1][0] == (("8.8.8.8", 53),)
+        assert _probed(mock_connection) == _all_targets(2.0)
     
     @patch('socket.create_connection')
     def test_fallback_to_opendns(self, mock_connection):
         """Test fallback to OpenDNS when Cloudflare and Google fail."""
-        # First two calls fail, third call (OpenDNS) succeeds
-        mock_connection.side_effect = [
-            OSError("Connection failed"),
-            OSError("Connection failed"),
-            Mock()  # Success
-        ]
+        mock_connection.side_effect = _respond({"208.67.222.222"})
         
         result = check_internet_connectivity()
         
         assert result is True
-        assert mock_connection.call_count == 3
-        
-        # Verify calls
-        calls = mock_connection.call_args_list
-        assert calls[0][0] == (("1.1.1.1", 53),)
-        assert calls[1][0] == (("8.8.8.8", 53),)
-        assert calls[2][0] == (("208.67.222.222", 53),)
+        assert _probed(mock_connection) == _all_targets(2.0)
     
     @patch('socket.create_connection')
     def test_fallback_to_quad9(self, mock_connection):
         """Test fallback to Quad9 when all other DNS servers fail."""
-        # First three calls fail, fourth call (Quad9) succeeds
-        mock_connection.side_effect = [
-            OSError("Connection failed"),
-            OSError("Connection failed"),
-            OSError("Connection failed"),
-            Mock()  # Success
-        ]
+        mock_connection.side_effect = _respond({"9.9.9.9"})
         
         result = check_internet_connectivity()
         
         assert result is True
-        assert mock_connection.call_count == 4
-        
-        # Verify all DNS servers were tried
-        calls = mock_connection.call_args_list
-        assert calls[0][0] == (("1.1.1.1", 53),)
-        assert calls[1][0] == (("8.8.8.8", 53),)
-        assert calls[2][0] == (("208.67.222.222", 53),)
-        assert calls[3][0] == (("9.9.9.9", 53),)
+        assert _probed(mock_connection) == _all_targets(2.0)
     
     @patch('socket.create_connection')
     def test_all_fallbacks_fail(self, mock_connection):
@@ -188,7 +239,7 @@ class TestConnectivityEdgeCases:
         result = check_internet_connectivity(timeout=0.0)
         
         assert result is True
-        mock_connection.assert_called_once_with(("1.1.1.1", 53), timeout=0.0)
+        assert _probed(mock_connection) == _all_targets(0.0)
     
     @patch('socket.create_connection')
     def test_negative_timeout(self, mock_connection):
@@ -212,7 +263,7 @@ class TestConnectivityEdgeCases:
         result = check_internet_connectivity(timeout=3600.0)
         
         assert result is True
-        mock_connection.assert_called_once_with(("1.1.1.1", 53), timeout=3600.0)
+        assert _probed(mock_connection) == _all_targets(3600.0)
     
     @patch('socket.create_connection')
     def test_connection_closes_properly(self, mock_connection):
@@ -223,23 +274,20 @@ class TestConnectivityEdgeCases:
         result = check_internet_connectivity()
         
         assert result is True
-        # Connection object should be created
-        mock_connection.assert_called_once()
+        # Connection object should be created and closed again
+        mock_connection.assert_called()
+        mock_conn.close.assert_called()
     
     @patch('socket.create_connection')
     def test_intermittent_failures(self, mock_connection):
         """Test behavior with intermittent failures (some servers work, some don't)."""
         # Simulate: Cloudflare fails, Google fails, OpenDNS works
-        mock_connection.side_effect = [
-            OSError("Timeout"),
-            OSError("Refused"),
-            Mock()  # Success
-        ]
+        mock_connection.side_effect = _respond({"208.67.222.222"}, OSError("Timeout"))
         
         result = check_internet_connectivity(timeout=1.0)
         
         assert result is True
-        assert mock_connection.call_count == 3
+        assert _probed(mock_connection) == _all_targets(1.0)
 
 
 class TestConnectivityErrorTypes:
@@ -293,23 +341,20 @@ class TestConnectivityMultipleCalls:
         assert result1 is True
         assert result2 is True
         assert result3 is True
-        assert mock_connection.call_count == 3
+        assert _probed(mock_connection) == _all_targets(2.0)
+        assert mock_connection.call_count == 3 * len(DNS_PROBE_TARGETS)
     
     @patch('socket.create_connection')
     def test_alternating_success_failure(self, mock_connection):
         """Test alternating success and failure calls."""
         # Alternate between success and failure
-        mock_connection.side_effect = [
-            Mock(),  # Success
-            OSError("Failed"),  # All fail
-            OSError("Failed"),
-            OSError("Failed"),
-            OSError("Failed"),
-            Mock(),  # Success again
-        ]
-        
+        mock_connection.return_value = Mock()
         result1 = check_internet_connectivity()
+        
+        mock_connection.side_effect = OSError("Failed")  # All fail
         result2 = check_internet_connectivity()
+        
+        mock_connection.side_effect = None  # Success again
         result3 = check_internet_connectivity()
         
         assert result1 is True
@@ -400,8 +445,80 @@ class TestConnectivityPerformance:
         elapsed_time = time.time() - start_time
         
         assert result is False
-        # Should complete within reasonable time (4 attempts * 0.1s + overhead)
+        # Probes run concurrently, so this is well under 4 attempts * 0.1s
+        assert elapsed_time < 0.4
+
+
+class TestNetworkChangeWatcher:
+    """Test the netlink-based network change watcher."""
+    
+    @patch('socket.socket')
+    def test_fallback_when_netlink_unavailable(self, mock_socket):
+        """Test that wait() degrades to a plain timed sleep without netlink."""
+        import time
+        
+        mock_socket.side_effect = OSError("Address family not supported")
+        
+        watcher = NetworkChangeWatcher()
+        start_time = time.time()
+        changed = watcher.wait(0.1)
+        elapsed_time = time.time() - start_time
+        watcher.close()
+        
+        assert watcher.is_event_driven is False
+        assert changed is False
+        assert elapsed_time >= 0.1
+    
+    def test_wait_times_out_without_changes(self):
+        """Test that wait() returns False when nothing changes."""
+        watcher = NetworkChangeWatcher()
+        try:
+            assert watcher.wait(0.05) is False
+        finally:
+            watcher.close()
+    
+    def test_interrupt_wakes_blocked_wait(self):
+        """Test that interrupt() from another thread ends a long wait() early."""
+        import threading
+        import time
+        
+        watcher = NetworkChangeWatcher()
+        try:
+            threading.Timer(0.1, watcher.interrupt).start()
+            start_time = time.time()
+            changed = watcher.wait(5.0)
+            elapsed_time = time.time() - start_time
+            
+            assert changed is False
+            assert elapsed_time < 2.0
+            # Later waits return at once as well
+            assert watcher.wait(5.0) is False
+        finally:
+            watcher.close()
+    
+    @patch('socket.socket')
+    def test_interrupt_without_netlink(self, mock_socket):
+        """Test that interrupt() also ends the fallback sleep."""
+        import time
+        
+        mock_socket.side_effect = OSError("Address family not supported")
+        
+        watcher = NetworkChangeWatcher()
+        watcher.interrupt()
+        start_time = time.time()
+        changed = watcher.wait(5.0)
+        elapsed_time = time.time() - start_time
+        watcher.close()
+        
+        assert changed is False
         assert elapsed_time < 1.0
+    
+    def test_close_is_idempotent(self):
+        """Test that closing twice is harmless."""
+        watcher = NetworkChangeWatcher()
+        watcher.close()
+        watcher.close()
+        assert watcher.is_event_driven is False
 
 
 if __name__ == '__main__':
@@ -0,0 +1,171 @@
+"""
+Tests for exam session helpers.
+
+Tests the on-disk state handling used to resume a session:
+- Atomic JSON writes of assignment and timer state
+- Failed writes leaving the previous file intact
+- Audit events written to session.log without delay
+- Code hashes re-read for submissions
+"""
+
+import pytest
+import hashlib
+import json
+import os
+import time
+from unittest.mock import patch
+from pathlib import Path
+
+# Add parent directory to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runner.exam import ExamSession, _write_json_atomic
+from runner.models import Bank, ExamConfig, NetworkMonitoringConfig, AIDetectionConfig
+
+
+@pytest.fixture
+def session(tmp_path):
+    bank = Bank(
+        group="G1",
+        version="1",
+        easy=[],
+        medium=[],
+        hard=[],
+        network_monitoring=NetworkMonitoringConfig.default(),
+        ai_detection=AIDetectionConfig.default()
+    )
+    session = ExamSession("Alice", "Smith", "G1", bank, tmp_path, ExamConfig.default())
+    yield session
+    session.close_log()
+
+
+class TestWriteJsonAtomic:
+    """Test atomic JSON writes."""
+    
+    def test_writes_json(self, tmp_path):
+        """Test that the data is written as readable JSON."""
+        path = tmp_path / "timer_state.json"
+        
+        _write_json_atomic(path, {"elapsed": 12, "questions": ["q1", "q2"]})
+        
+        assert json.loads(path.read_text(encoding="utf-8")) == {"elapsed": 12, "questions": ["q1", "q2"]}
+        assert not (tmp_path / "timer_state.json.tmp").exists()
+    
+    def test_replaces_existing_file(self, tmp_path):
+        """Test that an existing file is replaced as a whole."""
+        path = tmp_path / "assignment.json"
+        path.write_text(json.dumps({"old": True, "padding": "x" * 100}), encoding="utf-8")
+        
+        _write_json_atomic(path, {"new": True})
+        
+        assert json.loads(path.read_text(encoding="utf-8")) == {"new": True}
+    
+    def test_data_is_synced_before_rename(self, tmp_path):
+        """Test that the temp file is fsynced before it replaces the destination."""
+        path = tmp_path / "timer_state.json"
+        calls = []
+        
+        with patch('runner.exam.os.fsync', side_effect=lambda fd: calls.append("fsync")), \
+             patch('runner.exam.os.replace', side_effect=lambda src, dst: calls.append("replace")):
+            _write_json_atomic(path, {"elapsed": 1})
+        
+        assert calls == ["fsync", "replace"]
+    
+    def test_failed_write_leaves_original_untouched(self, tmp_path):
+        """Test that a write failing before the rename keeps the old file."""
+        path = tmp_path / "timer_state.json"
+        original = json.dumps({"elapsed": 42})
+        path.write_text(original, encoding="utf-8")
+        
+        with patch('runner.exam.os.fsync', side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                _write_json_atomic(path, {"elapsed": 43})
+        
+        assert path.read_text(encoding="utf-8") == original
+        assert not (tmp_path / "timer_state.json.tmp").exists()
+    
+    def test_failed_rename_leaves_original_untouched(self, tmp_path):
+        """Test that a failing rename keeps the old file and removes the temp file."""
+        path = tmp_path / "assignment.json"
+        original = json.dumps({"assigned_tasks": {"q1": "E01"}})
+        path.write_text(original, encoding="utf-8")
+        
+        with patch('runner.exam.os.replace', side_effect=PermissionError("locked")):
+            with pytest.raises(PermissionError):
+                _write_json_atomic(path, {"assigned_tasks": {"q1": "E02"}})
+        
+        assert path.read_text(encoding="utf-8") == original
+        assert not (tmp_path / "assignment.json.tmp").exists()
+
+
+class TestSessionLog:
+    """Test that audit events reach session.log without waiting for the writer."""
+    
+    def test_sync_event_is_written_immediately(self, session):
+        """Test that a submission entry is on disk as soon as log() returns."""
+        with patch('runner.exam.os.fsync') as mock_fsync:
+            session.log("COMMAND_RUN", "Command: status")
+            session.log("SUBMISSION", "Question: q1, Score: 5.00")
+        
+        content = session.log_path.read_text(encoding="utf-8")
+        assert "COMMAND_RUN - Command: status" in content
+        assert "SUBMISSION - Question: q1, Score: 5.00" in content
+        assert content.index("COMMAND_RUN") < content.index("SUBMISSION")
+        mock_fsync.assert_called()
+    
+    def test_sync_event_in_batch_is_written_immediately(self, session):
+        """Test that log_entries() writes through when a batch holds an audit event."""
+        session.log_entries([
+            (time.time(), "NETWORK_CHECK", "Check #1: Internet status = True"),
+            (time.time(), "NETWORK_DETECTED", "Internet connection detected during exam - exam paused"),
+        ])
+        
+        content = session.log_path.read_text(encoding="utf-8")
+        assert "NETWORK_CHECK" in content
+        assert "NETWORK_DETECTED" in content
+    
+    def test_routine_event_is_queued(self, session):
+        """Test that routine entries are left to the background writer."""
+        with patch.object(session, 'flush_log') as mock_flush:
+            session.log("COMMAND_RUN", "Command: help")
+        
+        mock_flush.assert_not_called()
+
+
+class TestCodeSha256:
+    """Test the stat-keyed code hash cache."""
+    
+    def _rewrite_keeping_stat(self, path, content):
+        """Change a file's content but restore its mtime, as a coarse-mtime filesystem would."""
+        st = path.stat()
+        path.write_text(content)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    
+    def test_unchanged_stat_reuses_digest(self, session, tmp_path):
+        """Test that a plain lookup trusts the cached digest while mtime and size match."""
+        code_file = tmp_path / "q1.py"
+        code_file.write_text("print(1)\n")
+        first = session.code_sha256(str(code_file))
+        
+        self._rewrite_keeping_stat(code_file, "print(2)\n")
+        
+        assert session.code_sha256(str(code_file)) == first
+    
+    def test_refresh_rereads_file(self, session, tmp_path):
+        """Test that refresh=True sees an edit that kept mtime and size."""
+        code_file = tmp_path / "q1.py"
+        code_file.write_text("print(1)\n")
+        first = session.code_sha256(str(code_file))
+        
+        self._rewrite_keeping_stat(code_file, "print(2)\n")
+        
+        refreshed = session.code_sha256(str(code_file), refresh=True)
+        assert refreshed != first
+        assert refreshed == hashlib.sha256(b"print(2)\n").hexdigest()
+        # The fresh digest replaces the cached one
+        assert session.code_sha256(str(code_file)) == refreshed
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,173 @@
+"""
+Tests for grader module.
+
+Tests the grading of submissions including:
+- Parallel grading off by default
+- Worker count for parallel grading
+- Parallel and serial runs giving the same results in test order
+- Detecting files without code, including ones the parser can't handle
+"""
+
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add parent directory to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runner.grader import Grader
+from runner.models import ExamConfig, Task
+
+
+def _config(parallel_grading):
+    config = ExamConfig.default()
+    config.parallel_grading = parallel_grading
+    return config
+
+
+def _strip_timing(results):
+    """Drop the wall-clock field, which differs between runs."""
+    return [{k: v for k, v in result.items() if k != 'elapsed_ms'} for result in results]
+
+
+@pytest.fixture
+def stdin_task():
+    # Test 3 expects a wrong sum, so one test fails
+    return Task.from_dict({
+        "id": "T01",
+        "title": "Sum",
+        "prompt": "Print the sum of two integers.",
+        "io": {"mode": "stdin_stdout"},
+        "tests": [
+            {"input": f"{i} {i}\n", "output": str(2 * i if i != 3 else 0)}
+            for i in range(6)
+        ],
+        "time_limit_ms": 2000,
+        "memory_limit_mb": 256
+    })
+
+
+@pytest.fixture
+def function_task():
+    # Test 2 expects a wrong value, test 4 raises in the student code
+    return Task.from_dict({
+        "id": "T02",
+        "title": "Halve",
+        "prompt": "def halve(n: int) -> int:",
+        "io": {"mode": "function", "entrypoint": "halve"},
+        "tests": [
+            {"args": [n], "ret": n // 2 if n != 2 else 5}
+            for n in (0, 4, 2, 10, -1, 8)
+        ],
+        "time_limit_ms": 2000,
+        "memory_limit_mb": 256
+    })
+
+
+class TestParallelGradingConfig:
+    """Test the parallel_grading setting."""
+    
+    def test_off_by_default(self):
+        """Test that both the default config and a config without the key grade serially."""
+        assert ExamConfig.default().parallel_grading is False
+        data = {
+            "total_questions": 3, "easy_count": 1, "medium_count": 1, "hard_count": 1,
+            "easy_weight": 1.0, "medium_weight": 1.0, "hard_weight": 1.0,
+            "max_points": 3.0, "exam_time_minutes": 60, "work_dir_postfix": "EXAM"
+        }
+        assert ExamConfig.from_dict(data).parallel_grading is False
+        assert ExamConfig.from_dict({**data, "parallel_grading": True}).parallel_grading is True
+    
+    def test_serial_uses_one_worker(self):
+        """Test that a serial config never runs tests side by side."""
+        with patch('runner.grader.os.cpu_count', return_value=8):
+            assert Grader(_config(False))._grading_workers(6) == 1
+    
+    def test_workers_bounded_by_cpus_and_tests(self):
+        """Test that parallel grading uses one worker per CPU, at most one per test."""
+        grader = Grader(_config(True))
+        with patch('runner.grader.os.cpu_count', return_value=2):
+            assert grader._grading_workers(6) == 2
+        with patch('runner.grader.os.cpu_count', return_value=8):
+            assert grader._grading_workers(6) == 6
+        with patch('runner.grader.os.cpu_count', return_value=None):
+            assert grader._grading_workers(6) == 1
+
+
+class TestParallelGradingResults:
+    """Test that parallel grading doesn't change what is reported."""
+    
+    def _grade_both(self, task, code_path):
+        with patch('runner.grader.os.cpu_count', return_value=4):
+            parallel = Grader(_config(True)).grade_submission(task, str(code_path))
+        serial = Grader(_config(False)).grade_submission(task, str(code_path))
+        return parallel, serial
+    
+    def test_stdin_stdout_matches_serial(self, stdin_task, tmp_path):
+        """Test that a stdin/stdout task grades the same in parallel and serially."""
+        code_path = tmp_path / "q1.py"
+        code_path.write_text("a, b = map(int, input().split())\nprint(a + b)\n")
+        
+        parallel, serial = self._grade_both(stdin_task, code_path)
+        
+        assert parallel['passed'] == serial['passed'] == 5
+        assert [r['test_num'] for r in parallel['results']] == list(range(1, 7))
+        assert _strip_timing(parallel['results']) == _strip_timing(serial['results'])
+    
+    def test_function_matches_serial(self, function_task, tmp_path):
+        """Test that a function task grades the same in parallel and serially."""
+        code_path = tmp_path / "q1.py"
+        code_path.write_text(
+            "def halve(n):\n"
+            "    if n == 10:\n"
+            "        raise ValueError('no tens')\n"
+            "    return n // 2\n"
+        )
+        
+        parallel, serial = self._grade_both(function_task, code_path)
+        
+        assert parallel['passed'] == serial['passed'] == 4
+        assert [r['test_num'] for r in parallel['results']] == list(range(1, 7))
+        assert _strip_timing(parallel['results']) == _strip_timing(serial['results'])
+
+
+
+class TestNoCodeDetection:
+    """Test the parse-only check for files without statements."""
+    
+    def test_comments_only(self, tmp_path):
+        """Test that a file of comments and blank lines has no code."""
+        code_path = tmp_path / "q1.py"
+        code_path.write_text("# TODO\n\n   \n# later\n")
+        
+        assert Grader._has_no_code(str(code_path)) is True
+    
+    def test_syntax_error_counts_as_code(self, tmp_path):
+        """Test that a file that doesn't parse is left for the sandbox to report."""
+        code_path = tmp_path / "q1.py"
+        code_path.write_text("def solve(:\n")
+        
+        assert Grader._has_no_code(str(code_path)) is False
+    
+    def test_pathologically_nested_file(self, tmp_path):
+        """Test that code the parser runs out of memory on counts as code."""
+        code_path = tmp_path / "q1.py"
+        code_path.write_text("x = " + "-" * 1_000_000 + "1\n")
+        
+        assert Grader._has_no_code(str(code_path)) is False
+    
+    def test_pathologically_nested_file_is_graded(self, stdin_task, tmp_path):
+        """Test that grading such a file reports failed tests instead of raising."""
+        code_path = tmp_path / "q1.py"
+        code_path.write_text("x = " + "-" * 1_000_000 + "1\n")
+        
+        results = Grader(ExamConfig.default()).grade_submission(stdin_task, str(code_path))
+        
+        assert results['passed'] == 0
+        assert len(results['results']) == len(stdin_task.tests)
+        assert all(r['status'] not in ("passed", "failed") for r in results['results'])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,256 @@
+"""
+Tests for sandbox module.
+
+Tests the fork-server SandboxWorker used for function-mode grading including:
+- Return values, wrong answers and exceptions
+- Time limits, sys.exit and the memory limit
+- Tests not seeing each other's inputs
+- Falling back to run_code_function when a worker process dies
+- Batched results matching one subprocess per test, in order
+"""
+
+import pytest
+import textwrap
+from unittest.mock import patch
+from pathlib import Path
+
+# Add parent directory to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runner import sandbox
+from runner.sandbox import SandboxWorker, run_code_function
+from runner.grader import Grader
+from runner.models import ExamConfig, Task
+
+pytestmark = pytest.mark.skipif(not SandboxWorker.supported, reason="SandboxWorker needs os.fork")
+
+STUDENT_CODE = textwrap.dedent("""
+    import os
+    import signal
+    import sys
+
+    def solve(mode, n):
+        if mode == "loop":
+            while True:
+                pass
+        if mode == "exit":
+            sys.exit(3)
+        if mode == "memory":
+            return len(bytearray(2 * 1024 ** 3))
+        if mode == "raise":
+            raise ValueError("bad input")
+        if mode == "kill":
+            os.kill(os.getpid(), signal.SIGKILL)
+        return n * 2
+""")
+
+
+@pytest.fixture
+def code_path(tmp_path):
+    path = tmp_path / "q1.py"
+    path.write_text(STUDENT_CODE)
+    return str(path)
+
+
+def _call(code_path, args_list, timeout_sec=2.0, max_workers=1):
+    with SandboxWorker(code_path, "solve", 256) as worker:
+        return worker.call_batch(args_list, timeout_sec, max_workers)
+
+
+class TestSandboxWorkerResults:
+    """Test what SandboxWorker reports for single calls."""
+    
+    def test_return_value(self, code_path):
+        """Test that a normal call returns the function's value."""
+        [(status, return_value, error_msg, elapsed_ms)] = _call(code_path, [["ok", 21]])
+        
+        assert (status, return_value, error_msg) == ("success", 42, "")
+        assert elapsed_ms >= 0
+    
+    def test_wrong_answer_is_graded_failed(self, code_path):
+        """Test that a wrong return value is reported as a failed test."""
+        task = Task.from_dict({
+            "id": "T01",
+            "title": "Double",
+            "prompt": "def solve(mode: str, n: int) -> int:",
+            "io": {"mode": "function", "entrypoint": "solve"},
+            "tests": [
+                {"args": ["ok", 1], "ret": 2},
+                {"args": ["ok", 2], "ret": 5}
+            ],
+            "time_limit_ms": 2000,
+            "memory_limit_mb": 256
+        })
+        
+        results = Grader(ExamConfig.default()).grade_submission(task, code_path)
+        
+        assert results['passed'] == 1
+        assert [r['status'] for r in results['results']] == ["passed", "failed"]
+        assert results['results'][1]['student_output'] == 4
+        assert results['results'][1]['expected_output'] == 5
+    
+    def test_exception(self, code_path):
+        """Test that an exception in the function is a runtime error."""
+        [(status, return_value, error_msg, _)] = _call(code_path, [["raise", 0]])
+        
+        assert (status, return_value, error_msg) == ("runtime_error", None, "bad input")
+    
+    def test_infinite_loop_times_out(self, code_path):
+        """Test that a call that never returns is stopped and reported as a timeout."""
+        # Under a second, so the 2x wall-clock limit ends it before the
+        # 1 second CPU limit could
+        [(status, return_value, _, _)] = _call(code_path, [["loop", 0]], timeout_sec=0.4)
+        
+        assert (status, return_value) == ("timeout", None)
+    
+    def test_sys_exit(self, code_path):
+        """Test that sys.exit() in the function ends only that test."""
+        results = _call(code_path, [["exit", 0], ["ok", 3]])
+        
+        assert results[0][0] == "runtime_error"
+        assert results[0][:3] == run_code_function(code_path, "solve", ["exit", 0], 2.0, 256)
+        assert results[1][:3] == ("success", 6, "")
+    
+    def test_memory_limit(self, code_path):
+        """Test that allocating past the memory limit fails like it does in a subprocess."""
+        results = _call(code_path, [["memory", 0], ["ok", 3]])
+        
+        assert results[0][0] in ("runtime_error", "memory_error")
+        assert results[0][:3] == run_code_function(code_path, "solve", ["memory", 0], 2.0, 256)
+        assert results[1][:3] == ("success", 6, "")
+
+
+class TestSandboxWorkerIsolation:
+    """Test that forked tests don't share state."""
+    
+    def test_test_cannot_see_other_inputs(self, tmp_path):
+        """Test that a forked test finds no other test's arguments in its memory."""
+        path = tmp_path / "q1.py"
+        path.write_text(textwrap.dedent("""
+            import gc
+            import re
+            
+            def solve(token):
+                seen = set()
+                for obj in gc.get_objects():
+                    if isinstance(obj, dict):
+                        items = list(obj.keys()) + list(obj.values())
+                    elif isinstance(obj, (list, tuple)):
+                        items = obj
+                    else:
+                        continue
+                    for item in items:
+                        if isinstance(item, bytes):
+                            item = item.decode("utf-8", "replace")
+                        if isinstance(item, str):
+                            seen.update(re.findall(r"secret-\\d+", item))
+                seen.discard(token)
+                return sorted(seen)
+        """))
+        tokens = [f"secret-{i}" for i in range(4)]
+        
+        with SandboxWorker(str(path), "solve", 256) as worker:
+            results = worker.call_batch([[token] for token in tokens], 2.0)
+        
+        assert [result[:3] for result in results] == [("success", [], "")] * len(tokens)
+    
+    def test_state_does_not_leak_between_tests(self, tmp_path):
+        """Test that module state changed by one test is fresh in the next."""
+        path = tmp_path / "q1.py"
+        path.write_text("calls = []\n\ndef solve(n):\n    calls.append(n)\n    return len(calls)\n")
+        
+        with SandboxWorker(str(path), "solve", 256) as worker:
+            results = worker.call_batch([[1], [2], [3]], 2.0)
+        
+        assert [result[:3] for result in results] == [("success", 1, "")] * 3
+
+
+class TestSandboxWorkerFallback:
+    """Test that tests still get graded when a worker process dies."""
+    
+    def test_server_crash_falls_back_to_subprocess(self, tmp_path):
+        """Test that the tests a crashed worker didn't finish run through run_code_function."""
+        marker = tmp_path / "crash-once"
+        marker.touch()
+        path = tmp_path / "q1.py"
+        # The first run of test 3 kills the worker process that forked it
+        path.write_text(textwrap.dedent(f"""
+            import os
+            import signal
+            
+            def solve(n):
+                if n == 2 and os.path.exists({str(marker)!r}):
+                    os.remove({str(marker)!r})
+                    os.kill(os.getppid(), signal.SIGKILL)
+                return n * 10
+        """))
+        
+        with patch('runner.sandbox.run_code_function', wraps=run_code_function) as mock_run:
+            with SandboxWorker(str(path), "solve", 256) as worker:
+                results = worker.call_batch([[n] for n in range(5)], 2.0)
+        
+        assert not marker.exists()
+        assert [result[:3] for result in results] == [("success", n * 10, "") for n in range(5)]
+        # Tests 1 and 2 came from the worker, the rest from subprocesses
+        assert [c.args[2] for c in mock_run.call_args_list] == [[2], [3], [4]]
+    
+    def test_server_error_falls_back_to_subprocess(self, code_path):
+        """Test that every test of a worker that fails outright still runs."""
+        with patch.object(sandbox._ForkServer, 'run_test', side_effect=OSError("sandbox worker exited")):
+            results = _call(code_path, [["ok", 1], ["raise", 0], ["ok", 2]])
+        
+        assert [result[:3] for result in results] == [
+            ("success", 2, ""),
+            ("runtime_error", None, "bad input"),
+            ("success", 4, ""),
+        ]
+    
+    def test_hung_server_falls_back_to_subprocess(self, code_path):
+        """Test that a worker that stops answering is abandoned for subprocesses."""
+        with patch.object(sandbox._ForkServer, 'run_test', return_value=None):
+            results = _call(code_path, [["ok", 1], ["ok", 2]])
+        
+        assert [result[:3] for result in results] == [("success", 2, ""), ("success", 4, "")]
+
+
+
+class TestCallBatchMatchesSubprocess:
+    """Regression test: call_batch gives what one run_code_function per test gives."""
+    
+    def test_mixed_batch_matches_run_code_function(self, code_path):
+        """Test a two-worker batch with a timeout and a killed test mid-chunk against subprocesses."""
+        # Split into [ok, kill, loop, ok] and [ok, raise, ok]
+        args_list = [
+            ["ok", 0],
+            ["kill", 0],
+            ["loop", 0],
+            ["ok", 1],
+            ["ok", 2],
+            ["raise", 0],
+            ["ok", 3],
+        ]
+        
+        # 0.4 s keeps the wall-clock timeout ahead of the 1 second CPU limit
+        batched = _call(code_path, args_list, timeout_sec=0.4, max_workers=2)
+        expected = [run_code_function(code_path, "solve", args, 0.4, 256) for args in args_list]
+        
+        assert [result[:3] for result in batched] == expected
+        assert [result[0] for result in batched] == [
+            "success", "runtime_error", "timeout", "success", "success", "runtime_error", "success"
+        ]
+        assert [result[1] for result in batched if result[0] == "success"] == [0, 2, 4, 6]
+    
+    def test_single_worker_matches_multiple_workers(self, code_path):
+        """Test that splitting a batch across workers keeps results in argument order."""
+        args_list = [["ok", n] for n in range(9)]
+        
+        serial = _call(code_path, args_list, max_workers=1)
+        parallel = _call(code_path, args_list, max_workers=4)
+        
+        assert [result[:3] for result in parallel] == [result[:3] for result in serial]
+        assert [result[1] for result in parallel] == [2 * n for n in range(9)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -1,10 +1,17 @@
 import base64
+import functools
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 
+@functools.lru_cache(maxsize=4)
 def derive_key_from_password(password: str, salt: bytes) -> bytes:
-    """Derive a Fernet key from a password using PBKDF2."""
+    """
+    Derive a Fernet key from a password using PBKDF2.
+
+    Results are cached per (password, salt), so decrypting and re-encrypting
+    with the same salt only pays for the 480k iterations once.
+    """
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,